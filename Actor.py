@@ -1,8 +1,12 @@
 import os
 import random
-from random import gauss
+from collections import OrderedDict
 import pygame
-from DynamicBehaviorPredictor import DynamicBehaviorPredictor
+from PredictorBackend import make_predictor
+from InputSource import KeyboardInputSource
+from AssetCache import asset_cache
+from CollisionSystem import CollisionSystem
+from NoiseSource import default_noise_source
 
 
 class Actor:
@@ -29,7 +33,14 @@ class Actor:
                  sample_rate=30,
                  dimension=2,
                  noise_std_deviation=0.1,
-                 ai_action=False):
+                 ai_action=False,
+                 noise_source=None,
+                 world=None):
+
+        # Actors registered in a PhysicsWorld keep force, acceleration, velocity, position and resistance in the
+        # world arrays; the properties below then read and write the actor's row.
+        self.world = None
+        self.world_index = None
 
         self.surface = surface
         self.surface_size = surface_size
@@ -50,47 +61,85 @@ class Actor:
         self.sample_period = 1/sample_rate
         self.dimension = dimension
         self.noise_std_deviation = noise_std_deviation
+        if noise_source is None:
+            self.noise_source = default_noise_source
+        else:
+            self.noise_source = noise_source
         self.ai_action = ai_action
 
-        if init_force is None:
+        self.init_resistance = init_resistance
+        self.init_force = init_force
+        self.init_vel = init_vel
+        self.init_pos = init_pos
+        self.init_ref_pos = init_ref_pos
+        self.reset_kinematics()
+
+        # fraction of the next simulation step elapsed at render time, used by draw_pos:
+        self.interpolation = 1
+        # static layer actors draw a frame that only changes with their frame_key; with dirty rect rendering they
+        # only repaint the dirty areas with redraw_area, in their place in the drawing order:
+        self.static_layer = False
+
+        if world is not None:
+            self.world_index = world.add_actor(self)
+            self.world = world
+
+    def reset_kinematics(self):
+        self.resistance = self.init_resistance
+
+        if self.init_force is None:
             self.action_force_input = [0]*self.dimension
         else:
-            self.action_force_input = init_force
+            self.action_force_input = list(self.init_force)
 
-        self.acl = [self.action_force_input[i]/mass for i in range(self.dimension)]
+        self.acl = [self.action_force_input[i]/self.mass for i in range(self.dimension)]
 
-        if init_vel is None:
+        if self.init_vel is None:
             self.vel = [0]*self.dimension
         else:
-            self.vel = init_vel
+            self.vel = list(self.init_vel)
 
-        if init_pos is None:
+        if self.init_pos is None:
             self.pos = [dim_size//2 for dim_size in self.surface_size]
         else:
-            self.pos = init_pos
+            self.pos = self.init_pos
 
-        if init_ref_pos is None:
-            self.ref_pos = init_pos
+        if self.init_ref_pos is None:
+            self.ref_pos = self.init_pos
         else:
-            self.ref_pos = init_ref_pos
+            self.ref_pos = self.init_ref_pos
+
+        self.save_previous_state()
+
+    def save_previous_state(self):
+        self.previous_pos = [pos for pos in self.pos]
+
+    def reset(self, reinitialize_model=False):
+        # Back to the state right after __init__, used to restart the game in place.
+        self.main_state = 'start_state'
+        self.reset_kinematics()
 
     def update_controller_action(self):
         if self.controller is not None:
             self.controller.close_loop_action_control(self, self.ref_pos)
 
     def update_pos(self):
+        if self.world is not None:
+            # integrated by PhysicsWorld.integrate
+            return
+
         for i in range(self.dimension):
             self.acl[i] = (self.action_force_input[i]/self.mass)
             self.vel[i] += self.acl[i] * self.sample_period\
                 - self.vel[i]*self.resistance + self.noise
             self.pos[i] += int(self.vel[i] * self.sample_period * self.pixel_meter)
 
-    def check_collision_events(self, actor_list):
-        if self.reaction_effect is True:
-            for actor in actor_list:
-                if actor.reaction_effect is True and actor.id_number != self.id_number:
-                    actor.collision(self)
-                    self.collision(actor)
+    def collision_ready(self):
+        return self.reaction_effect is True
+
+    def collision_bounds(self):
+        # (left, top, right, bottom) of the area where the actor can collide, None when it is not bounded:
+        return None
 
     def machine_state(self):
         pass
@@ -107,21 +156,90 @@ class Actor:
     def collision(self, actor):
         pass
 
+    def check_collision_events(self, actor_list, collision_system=None):
+        # The collisions of this actor with actor_list, dispatched like the game loop does through CollisionSystem.
+        if collision_system is None:
+            collision_system = CollisionSystem()
+        collision_system.check_actor(self, actor_list)
+
     def animation(self):
-        pass
+        # draws the actor on its surface and returns the list of rects it drew on
+        return []
 
     @property
     def noise(self):
-        return gauss(mu=0, sigma=self.noise_std_deviation)
+        return self.noise_source.normal(self.noise_std_deviation)
 
     @property
     def pos(self):
+        if self.world is not None:
+            return self.world.pos[self.world_index]
         return self._pos
 
     @pos.setter
     def pos(self, value):
         if value is not None:
-            self._pos = [int(i) for i in value]
+            if self.world is not None:
+                self.world.pos[self.world_index] = value
+            else:
+                self._pos = [int(i) for i in value]
+
+    @property
+    def vel(self):
+        if self.world is not None:
+            return self.world.vel[self.world_index]
+        return self._vel
+
+    @vel.setter
+    def vel(self, value):
+        if self.world is not None:
+            self.world.vel[self.world_index] = value
+        else:
+            self._vel = value
+
+    @property
+    def acl(self):
+        if self.world is not None:
+            return self.world.acl[self.world_index]
+        return self._acl
+
+    @acl.setter
+    def acl(self, value):
+        if self.world is not None:
+            self.world.acl[self.world_index] = value
+        else:
+            self._acl = value
+
+    @property
+    def action_force_input(self):
+        if self.world is not None:
+            return self.world.force[self.world_index]
+        return self._action_force_input
+
+    @action_force_input.setter
+    def action_force_input(self, value):
+        if self.world is not None:
+            self.world.force[self.world_index] = value
+        else:
+            self._action_force_input = value
+
+    @property
+    def resistance(self):
+        if self.world is not None:
+            return self.world.resistance[self.world_index]
+        return self._resistance
+
+    @resistance.setter
+    def resistance(self, value):
+        if self.world is not None:
+            self.world.resistance[self.world_index] = value
+        else:
+            self._resistance = value
+
+    @property
+    def draw_pos(self):
+        return [int(previous_pos + (pos - previous_pos)*self.interpolation)
+                for previous_pos, pos in zip(self.previous_pos, self.pos)]
 
     @property
     def ref_pos(self):
@@ -184,7 +302,12 @@ class Player(Actor):
                  dimension=2,
                  noise_std_deviation=0.1,
                  control_mode='input_force',
-                 key_events=True):
+                 key_events=True,
+                 input_source=None,
+                 rotation_step=2,
+                 rotation_cache_size=90,
+                 noise_source=None,
+                 world=None):
 
         super().__init__(surface,
                          surface_size,
@@ -206,19 +329,35 @@ class Player(Actor):
                          pixel_meter=pixel_meter,
                          sample_rate=sample_rate,
                          dimension=dimension,
-                         noise_std_deviation=noise_std_deviation)
+                         noise_std_deviation=noise_std_deviation,
+                         noise_source=noise_source,
+                         world=world)
 
         self.control_mode = control_mode
         self.key_events = key_events
+        self.init_key_events = key_events
+        self.init_inherent_natural_action = inherent_natural_action
+
+        if input_source is None:
+            self.input_source = KeyboardInputSource()
+        else:
+            self.input_source = input_source
 
         self.aircraft_f22_image_set_path = 'aircraft_f22_sprite'
         self.aircraft_f22_image_set = []
 
         image_path = os.path.join(self.aircraft_f22_image_set_path, 'aircraft_f22_sprite.png')
-        self.aircraft_f22_image_set.append(pygame.image.load(image_path))
-        self.aircraft_f22_image_set[-1] = pygame.transform.scale(self.aircraft_f22_image_set[-1],
-                                                                 (self.aircraft_f22_image_set[-1].get_width()//2,
-                                                                  self.aircraft_f22_image_set[-1].get_height()//2))
+        self.aircraft_f22_image_set.append(asset_cache.image(image_path, scale=0.5))
+        # the sprite banks with the horizontal velocity, drawn from rotations made once every rotation_step degrees:
+        self.aircraft_f22_rotated = asset_cache.rotated(image_path,
+                                                        scale=0.5,
+                                                        angle_step=rotation_step,
+                                                        max_entries=rotation_cache_size)
+
+    def reset(self, reinitialize_model=False):
+        super().reset(reinitialize_model=reinitialize_model)
+        self.key_events = self.init_key_events
+        self.inherent_natural_action = self.init_inherent_natural_action
 
     def inherent_natural_action_forces(self):
         if self.inherent_natural_action is True:
@@ -227,26 +366,29 @@ class Player(Actor):
 
     def update_key_action(self):
         if self.key_events is True:
-            pressed = pygame.key.get_pressed()
+            pressed = self.input_source.get_pressed()
             if self.control_mode == 'input_force':
-                if pressed[pygame.K_UP]:
+                if pressed['up']:
                     self.action_force_input[1] -= 700
-                if pressed[pygame.K_DOWN]:
+                if pressed['down']:
                     self.action_force_input[1] += 700
-                if pressed[pygame.K_LEFT]:
+                if pressed['left']:
                     self.action_force_input[0] -= 700
-                if pressed[pygame.K_RIGHT]:
+                if pressed['right']:
                     self.action_force_input[0] += 700
             elif self.control_mode == 'close_loop':
-                if pressed[pygame.K_UP]:
+                if pressed['up']:
                     self.ref_pos[1] -= 5
-                if pressed[pygame.K_DOWN]:
+                if pressed['down']:
                     self.ref_pos[1] += 5
-                if pressed[pygame.K_LEFT]:
+                if pressed['left']:
                     self.ref_pos[0] -= 5
-                if pressed[pygame.K_RIGHT]:
+                if pressed['right']:
                     self.ref_pos[0] += 5
 
+    def collision_bounds(self):
+        return self.pos[0], self.pos[1], self.pos[0], self.pos[1]
+
     def collision(self, actor):
         if actor.category == 'side_wall':
             if actor.thickness//2 > self.pos[0]:
@@ -280,14 +422,15 @@ class Player(Actor):
 
 
     def animation(self):
+        dirty_rects = []
         if self.main_state == 'start_state':
             pass
 
         elif self.main_state == 'play_state':
+            pos = self.draw_pos
 
-            self.surface.blit(pygame.transform.rotate(self.aircraft_f22_image_set[0], -self.vel[0]),
-                              (self.pos[0]-self.aircraft_f22_image_set[0].get_width()//2 + abs(self.vel[0]//2),
-                               self.pos[1]-self.aircraft_f22_image_set[0].get_height()//2 - 10 - abs(self.vel[0]//2)))
+            rotated_image, offset = self.aircraft_f22_rotated.get(-self.vel[0])
+            dirty_rects.append(self.surface.blit(rotated_image, (pos[0] + offset[0], pos[1] + offset[1] - 10)))
 
             # pygame.draw.circle(self.surface,
             #                    self.color,
@@ -297,6 +440,8 @@ class Player(Actor):
         elif self.main_state == 'dead_state':
             pass
 
+        return dirty_rects
+
 
 class SideWall(Actor):
     def __init__(self,
@@ -321,7 +466,10 @@ class SideWall(Actor):
                  pixel_meter=10,
                  sample_rate=30,
                  dimension=2,
-                 noise_std_deviation=0.1):
+                 noise_std_deviation=0.1,
+                 render_cache_bytes=8*2**20,
+                 noise_source=None,
+                 world=None):
 
         super().__init__(surface,
                          surface_size,
@@ -342,11 +490,16 @@ class SideWall(Actor):
                          pixel_meter=pixel_meter,
                          sample_rate=sample_rate,
                          dimension=dimension,
-                         noise_std_deviation=noise_std_deviation)
+                         noise_std_deviation=noise_std_deviation,
+                         noise_source=noise_source,
+                         world=world)
 
         self.start_thickness = 2*surface_size[0]
         self.play_thickness = thickness
         self.thickness = self.start_thickness
+        # Growth per tick of contact. Each pair is handled once per tick instead of twice, hence 2x the old step, so the
+        # wall closes in at the old speed. The player is handled first and bounces off the wall before it grows.
+        self.collision_growth = 20
         self.animation_period = 10
         self.animation_timer = self.animation_period
         self.animation_complexity = 30
@@ -365,11 +518,36 @@ class SideWall(Actor):
         else:
             self.pos = init_pos
 
-        self.random_color = []
-        for _ in range(self.animation_complexity):
-            self.random_color.append([self.color[0] + random.getrandbits(5),
-                                      self.color[1] + random.getrandbits(6),
-                                      self.color[2] - random.getrandbits(7)])
+        # Fresh random colors are drawn every animation_period ticks and numbered by color_generation, so a frame key
+        # only recurs while both the colors and the thickness hold still. In play the wall only grows on contact and
+        # its frames are composed once into a transparent layer and reused. A frame only keeps the border band, as four
+        # strips cut from that layer, and the least recently used frames are dropped once the cache holds more than
+        # render_cache_bytes of pixels. On the other screens the thickness changes every tick, no frame ever repeats
+        # and the border is drawn directly.
+        self.color_generation = 0
+        self.random_color = self.random_palette()
+
+        self.render_cache_bytes = render_cache_bytes
+        self.render_cache = OrderedDict()
+        self.render_cache_used = 0
+        self.render_cache_hits = 0
+        self.render_cache_misses = 0
+        self.render_scratch = None
+        self.drawn_frame_key = None
+        self.drawn_frame = None
+        self.static_layer = True
+
+    def random_palette(self):
+        return [[self.color[0] + random.getrandbits(5),
+                 self.color[1] + random.getrandbits(6),
+                 self.color[2] - random.getrandbits(7)] for _ in range(self.animation_complexity)]
+
+    def reset(self, reinitialize_model=False):
+        super().reset(reinitialize_model=reinitialize_model)
+        self.thickness = self.start_thickness
+        self.animation_timer = self.animation_period
+        self.animation_spin = 'up'
+        self.animation_complexity_timer = 300
 
     def collision(self, actor):
         if actor.category == 'player':
@@ -377,11 +555,74 @@ class SideWall(Actor):
                 or actor.pos[0] > self.surface_size[0] - self.thickness//2\
                 or self.thickness//2 > actor.pos[1]\
                     or actor.pos[1] > self.surface_size[1] - self.thickness//2:
-                self.thickness = self.thickness + 10
+                self.thickness = self.thickness + self.collision_growth
+
+    @property
+    def frame_key(self):
+        return self.thickness, self.color_generation, self.pos[0], self.pos[1]
 
     def animation(self):
+        if self.main_state != 'play_state':
+            self.drawn_frame_key = None
+            self.drawn_frame = None
+            self.draw_border(self.surface)
+            return [self.surface.get_rect()]
+
+        key = self.frame_key
+        frame = self.render_cache.get(key)
+        if frame is None:
+            self.render_cache_misses += 1
+            frame = self.compose_frame()
+            self.render_cache[key] = frame
+            self.render_cache_used += self.frame_bytes(frame)
+            while self.render_cache_used > self.render_cache_bytes and len(self.render_cache) > 1:
+                self.render_cache_used -= self.frame_bytes(self.render_cache.popitem(last=False)[1])
+        else:
+            self.render_cache_hits += 1
+            self.render_cache.move_to_end(key)
+
+        self.drawn_frame_key = key
+        self.drawn_frame = frame
+        return [self.surface.blit(strip, rect) for strip, rect in frame]
+
+    def compose_frame(self):
+        # the border drawn once on the scratch layer, kept as (strip, rect) pairs covering its band
+        if self.render_scratch is None or self.render_scratch.get_size() != self.surface.get_size():
+            self.render_scratch = pygame.Surface(self.surface.get_size(), pygame.SRCALPHA)
+            if pygame.display.get_surface() is not None:
+                self.render_scratch = self.render_scratch.convert_alpha()
+        self.render_scratch.fill((0, 0, 0, 0))
+        self.draw_border(self.render_scratch)
+        return [(self.render_scratch.subsurface(rect).copy(), rect) for rect in self.border_rects()]
+
+    @staticmethod
+    def frame_bytes(frame):
+        return sum(strip.get_bytesize()*strip.get_width()*strip.get_height() for strip, _ in frame)
+
+    def border_rects(self):
+        # The widest polygon outline is thickness wide and centred on the screen edges, so nothing is drawn further
+        # than thickness//2 (plus rounding) inside them. Below animation_complexity the innermost outlines are 0 wide,
+        # which pygame draws filled, and off-centre walls or bands meeting in the middle get the whole screen too.
+        width, height = self.surface.get_size()
+        band = self.thickness//2 + 2
+        centred = self.pos[0] == self.surface_size[0]//2 and self.pos[1] == self.surface_size[1]//2
+        if self.thickness < self.animation_complexity or not centred or 2*band >= min(width, height):
+            return [pygame.Rect(0, 0, width, height)]
+        return [pygame.Rect(0, 0, width, band),
+                pygame.Rect(0, height - band, width, band),
+                pygame.Rect(0, band, band, height - 2*band),
+                pygame.Rect(width - band, band, band, height - 2*band)]
+
+    def redraw_area(self, rect):
+        # repaints rect of the border from the strips of the last drawn frame
+        for strip, strip_rect in self.drawn_frame:
+            clip = strip_rect.clip(rect)
+            if clip.width > 0 and clip.height > 0:
+                self.surface.blit(strip, clip.topleft, area=clip.move(-strip_rect.x, -strip_rect.y))
+
+    def draw_border(self, surface):
         for i in range(self.animation_complexity):
-            pygame.draw.polygon(self.surface,
+            pygame.draw.polygon(surface,
                                 self.random_color[i],
                                 [[self.pos[0] + self.surface_size[0] // 2,
                                   self.pos[0] - self.surface_size[0] // 2],
@@ -398,11 +639,8 @@ class SideWall(Actor):
             self.animation_timer -= 1
 
         else:
-            self.random_color = []
-            for _ in range(self.animation_complexity):
-                self.random_color.append([self.color[0] + random.getrandbits(5),
-                                          self.color[1] + random.getrandbits(6),
-                                          self.color[2] - random.getrandbits(7)])
+            self.random_color = self.random_palette()
+            self.color_generation += 1
 
             self.animation_timer = self.animation_period
 
@@ -463,8 +701,15 @@ class ComputerAim(Actor):
                  dimension=2,
                  noise_std_deviation=0.1,
                  control_mode='rnn',
+                 inference_engine='numpy',
+                 predictor=None,
+                 predictor_options=None,
+                 ring_radius_step=1,
+                 timing_noise_source=None,
                  ai_action=True,
-                 ai_target=None):
+                 ai_target=None,
+                 noise_source=None,
+                 world=None):
 
         super().__init__(surface,
                          surface_size,
@@ -486,40 +731,78 @@ class ComputerAim(Actor):
                          sample_rate=sample_rate,
                          dimension=dimension,
                          noise_std_deviation=noise_std_deviation,
-                         ai_action=ai_action)
+                         ai_action=ai_action,
+                         noise_source=noise_source,
+                         world=world)
+
+        # the shot timing draws from its own noise source, so it does not shift the physics noise:
+        if timing_noise_source is None:
+            self.timing_noise_source = self.noise_source
+        else:
+            self.timing_noise_source = timing_noise_source
 
         self.radius = size[0]
         self.control_mode = control_mode
         self.ai_target = ai_target
         self.shot_area = 20
         self.shot_period = 6
-        self.shot_timer = int(abs(self.shot_period * self.noise) + 2*self.shot_period)
-        self.shot_pos = [pos for pos in self.pos]
+        self.shot_timer = int(abs(self.shot_period * self.timing_noise) + 2*self.shot_period)
+        self.shot_pos = [int(pos) for pos in self.pos]
         self.aim_state = 'loading'
 
         self.shot_hit_image_set_path = 'warped_city_files/SPRITES/misc/enemy-explosion'
-        self.shot_hit_image_set = []
-
-        image_path = os.path.join(self.shot_hit_image_set_path, 'enemy-explosion-1.png')
-        self.shot_hit_image_set.append(pygame.image.load(image_path))
-        image_path = os.path.join(self.shot_hit_image_set_path, 'enemy-explosion-2.png')
-        self.shot_hit_image_set.append(pygame.image.load(image_path))
-        image_path = os.path.join(self.shot_hit_image_set_path, 'enemy-explosion-3.png')
-        self.shot_hit_image_set.append(pygame.image.load(image_path))
-        image_path = os.path.join(self.shot_hit_image_set_path, 'enemy-explosion-4.png')
-        self.shot_hit_image_set.append(pygame.image.load(image_path))
-        image_path = os.path.join(self.shot_hit_image_set_path, 'enemy-explosion-5.png')
-        self.shot_hit_image_set.append(pygame.image.load(image_path))
-        image_path = os.path.join(self.shot_hit_image_set_path, 'enemy-explosion-6.png')
-        self.shot_hit_image_set.append(pygame.image.load(image_path))
-        self.animation_complexity = 6
+        self.shot_hit_image_set = asset_cache.sequence(self.shot_hit_image_set_path, 'enemy-explosion')
+        self.animation_complexity = len(self.shot_hit_image_set)
         self.animation_count = 0
 
+        # Reticle layers are drawn on first use, when the display exists to convert them: the static reticle, the
+        # velocity rings cached by radius (quantized to ring_radius_step pixels) and the prediction markers.
+        # draw_calls counts the draw and blit calls of the last frame.
+        self.ring_radius_step = ring_radius_step
+        self.ring_cache_size = 256
+        self.reticle_layers = None
+        self.ring_cache = {}
+        self.marker_images = []
+        self.draw_calls = 0
+        self.dirty_rects = []
+
+        # control_mode selects the predictor backend by name, see PredictorBackend.PREDICTOR_BACKENDS, and
+        # predictor_options override the options of make_predictor. With a shared predictor the aim registers on one
+        # of its slots instead of building its own.
+        if predictor is not None:
+            self.ai_controller = predictor.register()
+        else:
+            self.ai_controller = self.make_predictor(control_mode,
+                                                     self.surface_size,
+                                                     inference_engine=inference_engine,
+                                                     **({} if predictor_options is None else predictor_options))
+        self.ai_controller.start()
+
+    @staticmethod
+    def make_predictor(control_mode, surface_size, inference_engine='numpy', **kwargs):
         if control_mode == 'rnn':
-            self.ai_controller = DynamicBehaviorPredictor(surface_size=self.surface_size,
-                                                          num_y_pred_output=5,
-                                                          num_neurons=200)
-            self.ai_controller.start_train_and_predict_thread()
+            predictor_options = {'num_neurons': 200,
+                                 'batch_size': 16,
+                                 'train_period': 2,
+                                 'inference_engine': inference_engine,
+                                 'model_file_name': './rnn_player_behavior_model.npz',
+                                 'update_model': False,
+                                 'load_model': False}
+        else:
+            predictor_options = {}
+
+        return make_predictor(control_mode,
+                              surface_size=surface_size,
+                              num_y_pred_output=5,
+                              **dict(predictor_options, **kwargs))
+
+    def reset(self, reinitialize_model=False):
+        super().reset(reinitialize_model=reinitialize_model)
+        self.shot_timer = int(abs(self.shot_period * self.timing_noise) + 2*self.shot_period)
+        self.shot_pos = [int(pos) for pos in self.pos]
+        self.aim_state = 'loading'
+        self.animation_count = 0
+        self.ai_controller.reset(reinitialize=reinitialize_model)
 
     def inherent_natural_action_forces(self):
         if self.inherent_natural_action is True:
@@ -528,9 +811,21 @@ class ComputerAim(Actor):
 
     def update_ai_action(self):
         if self.ai_action is True and self.ai_target is not None:
-            self.ai_controller.set_data_to_train([self.ai_target.pos[0],
-                                                  self.ai_target.pos[1]])
-            self.ref_pos = self.ai_controller.y_print[-1][-1]
+            self.ai_controller.push_sample([self.ai_target.pos[0],
+                                            self.ai_target.pos[1]])
+            self.ref_pos = self.ai_controller.get_trajectory()[-1]
+
+    @property
+    def timing_noise(self):
+        return self.timing_noise_source.normal(self.noise_std_deviation)
+
+    def collision_ready(self):
+        # the aim only hits while firing, the rest of the time it is left out of the broad phase:
+        return self.reaction_effect is True and self.main_state == 'play_state' and self.aim_state == 'fire'
+
+    def collision_bounds(self):
+        return (self.shot_pos[0] - self.shot_area, self.shot_pos[1] - self.shot_area,
+                self.shot_pos[0] + self.shot_area, self.shot_pos[1] + self.shot_area)
 
     def collision(self, actor):
         if self.main_state == 'play_state':
@@ -549,110 +844,149 @@ class ComputerAim(Actor):
                 elif self.shot_timer > self.shot_period-1:
                     self.aim_state = 'fire'
                     self.shot_timer -= 1
-                    self.shot_pos = [pos for pos in self.pos]
+                    self.shot_pos = [int(pos) for pos in self.pos]
                 elif self.shot_timer > 0:
                     self.aim_state = 'boom'
                     self.shot_timer -= 1
                 else:
                     self.aim_state = 'loading'
-                    self.shot_timer = int(abs(self.shot_period * self.noise) + 2*self.shot_period)
+                    self.shot_timer = int(abs(self.shot_period * self.timing_noise) + 2*self.shot_period)
 
             elif self.aim_state == 'loading':
-                if self.ai_controller.service_status == 'online':
+                if self.ai_controller.status == 'online':
                     self.aim_state = 'standby'
 
+    def new_layer(self, half_size):
+        # transparent square layer of side 2*half_size + 1, centered on pixel (half_size, half_size)
+        layer = pygame.Surface((2*half_size + 1, 2*half_size + 1), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert_alpha()
+        return layer
+
+    def build_reticle(self):
+        # The static parts of the reticle, split in the layer under the velocity rings (center dot and outer ring)
+        # and the layer over them (cross-hair and inner rings), as they were drawn in that order.
+        half_size = 12*self.radius + 4
+        center = [half_size, half_size]
+        under_layer = self.new_layer(half_size)
+        over_layer = self.new_layer(half_size)
+
+        pygame.draw.circle(under_layer,
+                           self.color,
+                           center,
+                           self.radius)
+
+        pygame.draw.circle(under_layer,
+                           self.color,
+                           center,
+                           10*self.radius,
+                           3)
+
+        pygame.draw.rect(over_layer,
+                         self.color,
+                         [center[0]-12*self.radius,
+                          center[1]-2,
+                          24*self.radius,
+                          4])
+
+        pygame.draw.rect(over_layer,
+                         self.color,
+                         [center[0]-2,
+                          center[1]-12*self.radius,
+                          4,
+                          24*self.radius])
+
+        pygame.draw.rect(over_layer,
+                         [self.color[0]//2, self.color[1]//2, self.color[2]//2],
+                         [center[0]-12*self.radius+1,
+                          center[1]-1,
+                          24*self.radius+2,
+                          2])
+
+        pygame.draw.rect(over_layer,
+                         [self.color[0]//2, self.color[1]//2, self.color[2]//2],
+                         [center[0]-1,
+                          center[1]-12*self.radius+1,
+                          2,
+                          24*self.radius+2])
+
+        pygame.draw.circle(over_layer,
+                           [self.color[0]//3, self.color[1]//3, self.color[2]//3],
+                           center,
+                           self.radius//2,
+                           3)
+
+        pygame.draw.circle(over_layer,
+                           [self.color[0]//10, self.color[1]//10, self.color[2]//10],
+                           center,
+                           self.radius//2)
+
+        self.reticle_layers = [under_layer, over_layer]
+
+    def ring(self, color, radius, width):
+        radius = max(0, int(round(radius/self.ring_radius_step))*self.ring_radius_step)
+        key = (tuple(color), radius, width)
+        if key not in self.ring_cache:
+            if len(self.ring_cache) >= self.ring_cache_size:
+                self.ring_cache.clear()
+            layer = self.new_layer(radius + 1)
+            pygame.draw.circle(layer, color, [radius + 1, radius + 1], radius, width)
+            self.ring_cache[key] = layer
+        return self.ring_cache[key]
+
+    def marker(self, i):
+        # prediction marker i, darker and thinner for the nearer predictions
+        while len(self.marker_images) <= i:
+            index = len(self.marker_images)
+            layer = self.new_layer(self.radius + 1)
+            pygame.draw.circle(layer, (51*index, 0, 0), [self.radius + 1, self.radius + 1], self.radius, index+1)
+            self.marker_images.append(layer)
+        return self.marker_images[i]
+
+    def blit_centered(self, layer, pos):
+        half_size = layer.get_width()//2
+        self.dirty_rects.append(self.surface.blit(layer, (int(pos[0]) - half_size, int(pos[1]) - half_size)))
+        self.draw_calls += 1
+
     def animation(self):
+        self.draw_calls = 0
+        self.dirty_rects = []
         if self.main_state == 'start_state':
             pass
 
         elif self.main_state == 'play_state':
+            pos = self.draw_pos
+            if self.reticle_layers is None:
+                self.build_reticle()
+
             if self.aim_state == 'standby':
                 pass
             elif self.aim_state == 'fire':
                 self.animation_count = 0
-                pygame.draw.circle(self.surface,
-                                   (255, 255, 0),
-                                   self.shot_pos,
-                                   4*self.shot_period//(self.shot_timer+1),
-                                   3)
+                self.blit_centered(self.ring((255, 255, 0), 4*self.shot_period//(self.shot_timer+1), 3),
+                                   self.shot_pos)
 
             elif self.aim_state == 'boom':
                 if self.animation_count < self.animation_complexity:
-                    self.surface.blit(self.shot_hit_image_set[self.animation_count], self.shot_pos)
+                    self.dirty_rects.append(self.surface.blit(self.shot_hit_image_set[self.animation_count],
+                                                              self.shot_pos))
+                    self.draw_calls += 1
                     self.animation_count += 1
 
-            for i, predict in enumerate(self.ai_controller.y_print[-1][-5:][:]):
-                pygame.draw.circle(self.surface,
-                                   (51*i, 0, 0),
-                                   predict,
-                                   self.radius,
-                                   i+1)
-
-            pygame.draw.circle(self.surface,
-                               self.color,
-                               self.pos,
-                               self.radius)
-
-            pygame.draw.circle(self.surface,
-                               self.color,
-                               self.pos,
-                               10*self.radius,
-                               3)
-
-            pygame.draw.circle(self.surface,
-                               self.color,
-                               self.pos,
-                               int((abs(self.vel[0]*self.vel[1]))**(1/2))+10,
-                               3)
-
-            pygame.draw.circle(self.surface,
-                               self.color,
-                               self.pos,
-                               int((abs(self.vel[0]*self.vel[1]))**(1/3))+10,
-                               4)
-
-            pygame.draw.rect(self.surface,
-                             self.color,
-                             [self.pos[0]-12*self.radius,
-                              self.pos[1]-2,
-                              24*self.radius,
-                              4])
-
-            pygame.draw.rect(self.surface,
-                             self.color,
-                             [self.pos[0]-2,
-                              self.pos[1]-12*self.radius,
-                              4,
-                              24*self.radius])
-
-            pygame.draw.rect(self.surface,
-                             [self.color[0]//2, self.color[1]//2, self.color[2]//2],
-                             [self.pos[0]-12*self.radius+1,
-                              self.pos[1]-1,
-                              24*self.radius+2,
-                              2])
-
-            pygame.draw.rect(self.surface,
-                             [self.color[0]//2, self.color[1]//2, self.color[2]//2],
-                             [self.pos[0]-1,
-                              self.pos[1]-12*self.radius+1,
-                              2,
-                              24*self.radius+2])
-
-            pygame.draw.circle(self.surface,
-                               [self.color[0]//3, self.color[1]//3, self.color[2]//3],
-                               self.pos,
-                               self.radius//2,
-                               3)
-
-            pygame.draw.circle(self.surface,
-                               [self.color[0]//10, self.color[1]//10, self.color[2]//10],
-                               self.pos,
-                               self.radius//2)
+            for i, predict in enumerate(self.ai_controller.get_trajectory()):
+                self.blit_centered(self.marker(i), predict)
+
+            velocity_product = abs(self.vel[0]*self.vel[1])
+            self.blit_centered(self.reticle_layers[0], pos)
+            self.blit_centered(self.ring(self.color, int(velocity_product**(1/2))+10, 3), pos)
+            self.blit_centered(self.ring(self.color, int(velocity_product**(1/3))+10, 4), pos)
+            self.blit_centered(self.reticle_layers[1], pos)
 
         elif self.main_state == 'dead_state':
             pass
 
+        return self.dirty_rects
+
 
 
 
@@ -0,0 +1,140 @@
+import glob
+import os
+import re
+import time
+from collections import OrderedDict
+import pygame
+
+
+class AssetCache:
+    # Process-wide image store keyed by (path, scale, alpha): every image is loaded and scaled once and shared by
+    # every actor. Images are converted to the display pixel format as soon as a display mode is set, so blits do not
+    # convert pixels every frame; images loaded before that (or headless) are converted on the first request after.
+    def __init__(self):
+        self.images = {}
+        self.converted = set()
+        self.sequences = {}
+        self.rotated_sprites = {}
+
+        self.loads = 0
+        self.hits = 0
+        self.load_time = 0
+
+    def image(self, path, scale=None, alpha=True):
+        # scale: a factor applied to both sides, as in the Player sprite, or None to keep the file size.
+        key = (path, scale, alpha)
+        if key in self.images:
+            self.hits += 1
+        else:
+            load_start = time.perf_counter()
+            surface = pygame.image.load(path)
+            if scale is not None:
+                surface = pygame.transform.scale(surface, (int(surface.get_width()*scale),
+                                                           int(surface.get_height()*scale)))
+            self.images[key] = surface
+            self.loads += 1
+            self.load_time += time.perf_counter() - load_start
+
+        if key not in self.converted and pygame.display.get_surface() is not None:
+            convert_start = time.perf_counter()
+            if alpha:
+                self.images[key] = self.images[key].convert_alpha()
+            else:
+                self.images[key] = self.images[key].convert()
+            self.converted.add(key)
+            self.load_time += time.perf_counter() - convert_start
+
+        return self.images[key]
+
+    def sequence(self, directory, prefix, scale=None, alpha=True):
+        # Frames named <prefix>-<number>.png in directory, in numeric order (enemy-explosion-2 before -10).
+        key = (directory, prefix)
+        if key not in self.sequences:
+            frame_pattern = re.compile(re.escape(prefix) + r'-(\d+)\.png$')
+            frame_paths = []
+            for path in glob.glob(os.path.join(directory, prefix + '-*.png')):
+                match = frame_pattern.search(os.path.basename(path))
+                if match is not None:
+                    frame_paths.append((int(match.group(1)), path))
+            self.sequences[key] = [path for _, path in sorted(frame_paths)]
+            if len(self.sequences[key]) == 0:
+                raise FileNotFoundError("no %s-<n>.png frames in %s" % (prefix, directory))
+
+        return [self.image(path, scale=scale, alpha=alpha) for path in self.sequences[key]]
+
+    def rotated(self, path, scale=None, alpha=True, angle_step=2, max_entries=None):
+        # The image pre-rotated in angle_step degree steps, shared like the image itself, see RotatedSprite.
+        key = (path, scale, alpha, angle_step, max_entries)
+        if key not in self.rotated_sprites:
+            load_start = time.perf_counter()
+            self.rotated_sprites[key] = RotatedSprite(self.image(path, scale=scale, alpha=alpha),
+                                                      angle_step=angle_step,
+                                                      max_entries=max_entries)
+            self.load_time += time.perf_counter() - load_start
+        return self.rotated_sprites[key]
+
+    @property
+    def memory(self):
+        # bytes of pixel data held by the cache
+        return (sum(surface.get_pitch()*surface.get_height() for surface in self.images.values())
+                + sum(rotated_sprite.memory for rotated_sprite in self.rotated_sprites.values()))
+
+    def stats(self):
+        return {'images': len(self.images),
+                'loads': self.loads,
+                'hits': self.hits,
+                'rotations': sum(rotated_sprite.rotations for rotated_sprite in self.rotated_sprites.values()),
+                'load_time': self.load_time,
+                'memory': self.memory}
+
+    def clear(self):
+        self.images.clear()
+        self.converted.clear()
+        self.sequences.clear()
+        self.rotated_sprites.clear()
+
+
+class RotatedSprite:
+    # Lookup table of an image rotated every angle_step degrees, each stored with the blit offset that centers it on
+    # the drawing position. With max_entries None every angle is rotated up front; otherwise angles are rotated on
+    # first use and at most max_entries are kept, the least recently used being dropped first.
+    def __init__(self,
+                 image,
+                 angle_step=2,
+                 max_entries=None):
+
+        self.image = image
+        self.angle_step = angle_step
+        self.num_angles = int(round(360/angle_step))
+        self.max_entries = max_entries
+
+        self.entries = OrderedDict()
+        self.rotations = 0
+        if self.max_entries is None:
+            for index in range(self.num_angles):
+                self.entries[index] = self.rotate(index)
+
+    def rotate(self, index):
+        surface = pygame.transform.rotate(self.image, index*self.angle_step)
+        self.rotations += 1
+        return surface, (-(surface.get_width()//2), -(surface.get_height()//2))
+
+    def get(self, angle):
+        # (surface, offset) of the nearest pre-rotated angle, in degrees counterclockwise like pygame.transform.rotate
+        index = int(round(angle/self.angle_step)) % self.num_angles
+        entry = self.entries.get(index)
+        if entry is None:
+            entry = self.rotate(index)
+            self.entries[index] = entry
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        elif self.max_entries is not None:
+            self.entries.move_to_end(index)
+        return entry
+
+    @property
+    def memory(self):
+        return sum(surface.get_pitch()*surface.get_height() for surface, _ in self.entries.values())
+
+
+asset_cache = AssetCache()
@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+import numpy as np
+
+
+# Names of the arrays in a checkpoint, in the order of NumpyRNNCell.from_weights and of the TF trainable variables.
+WEIGHT_NAMES = ('kernel', 'bias', 'projection_kernel', 'projection_bias')
+
+
+def save_weights(file_name, weights):
+    # Written to a temporary file first and moved over the old checkpoint, so a reader never sees a partial file.
+    temporary_file_name = file_name + '.tmp'
+    with open(temporary_file_name, 'wb') as checkpoint_file:
+        np.savez(checkpoint_file, **dict(zip(WEIGHT_NAMES, weights)))
+    os.replace(temporary_file_name, file_name)
+
+
+def load_weights(file_name):
+    with np.load(file_name) as checkpoint:
+        return [checkpoint[name] for name in WEIGHT_NAMES]
+
+
+class CheckpointWriter:
+    def __init__(self,
+                 file_name,
+                 min_interval=10.0):
+
+        self.file_name = file_name
+        self.min_interval = min_interval
+
+        # Only the newest submitted weights are kept; older ones not yet written are replaced.
+        self.condition = threading.Condition()
+        self.pending_weights = None
+        self.last_submit_time = None
+        self.last_write_time = None
+        self.checkpoints_written = 0
+        self.close_app = False
+
+        self.writer_thread_handler = threading.Thread(target=self.writer_thread)
+
+    def start(self):
+        self.writer_thread_handler.start()
+
+    def due(self):
+        return self.last_submit_time is None or time.perf_counter() - self.last_submit_time >= self.min_interval
+
+    def submit(self, weights):
+        with self.condition:
+            self.pending_weights = weights
+            self.last_submit_time = time.perf_counter()
+            self.condition.notify()
+
+    def close(self):
+        with self.condition:
+            self.close_app = True
+            self.condition.notify()
+        if self.writer_thread_handler.is_alive():
+            self.writer_thread_handler.join()
+
+    def writer_thread(self):
+        while True:
+            with self.condition:
+                while self.pending_weights is None and not self.close_app:
+                    self.condition.wait()
+
+                # throttle, unless closing, in which case the last weights are flushed right away:
+                while self.last_write_time is not None and not self.close_app:
+                    remaining_time = self.min_interval - (time.perf_counter() - self.last_write_time)
+                    if remaining_time <= 0:
+                        break
+                    self.condition.wait(remaining_time)
+
+                weights = self.pending_weights
+                self.pending_weights = None
+                close_app = self.close_app
+
+            if weights is not None:
+                save_weights(self.file_name, weights)
+                self.last_write_time = time.perf_counter()
+                self.checkpoints_written += 1
+
+            if close_app:
+                break
@@ -0,0 +1,88 @@
+import itertools
+
+
+# Category pairs that can collide. A pair whose categories are not listed here is never tested.
+DEFAULT_COLLISION_RULES = (('player', 'side_wall'),
+                           ('player', 'computer_aim'))
+
+
+class CollisionSystem:
+    # Broad phase over a uniform grid of cell_size pixels. Every actor that can currently collide reports its bounds
+    # (left, top, right, bottom) through collision_bounds(), or None when it has no bounded area, like the side wall
+    # that covers the whole border. Bounded actors are hashed into the grid cells they overlap and only actors sharing
+    # a cell become candidates; unbounded actors are candidates with every actor. Each candidate pair is dispatched once,
+    # to both collision() handlers.
+    def __init__(self,
+                 cell_size=64,
+                 rules=DEFAULT_COLLISION_RULES):
+
+        self.cell_size = cell_size
+        self.rules = set(frozenset(rule) for rule in rules)
+
+        self.grid = {}
+        self.candidate_pairs = 0
+        self.total_candidate_pairs = 0
+
+    def allowed(self, actor_a, actor_b):
+        return frozenset((actor_a.category, actor_b.category)) in self.rules
+
+    def broad_phase(self, actor_list):
+        self.grid.clear()
+        unbounded = []
+        bounded = []
+
+        for actor in actor_list:
+            if not actor.collision_ready():
+                continue
+            bounds = actor.collision_bounds()
+            if bounds is None:
+                unbounded.append(actor)
+                continue
+            bounded.append(actor)
+
+            left, top, right, bottom = bounds
+            for cell_x in range(int(left)//self.cell_size, int(right)//self.cell_size + 1):
+                for cell_y in range(int(top)//self.cell_size, int(bottom)//self.cell_size + 1):
+                    self.grid.setdefault((cell_x, cell_y), []).append(actor)
+
+        pairs = {}
+        for cell_actors in self.grid.values():
+            for actor_a, actor_b in itertools.combinations(cell_actors, 2):
+                if self.allowed(actor_a, actor_b):
+                    pairs[self.pair_key(actor_a, actor_b)] = (actor_a, actor_b)
+
+        for actor_a, actor_b in itertools.combinations(unbounded, 2):
+            if self.allowed(actor_a, actor_b):
+                pairs[self.pair_key(actor_a, actor_b)] = (actor_a, actor_b)
+        for actor_a in unbounded:
+            for actor_b in bounded:
+                if self.allowed(actor_a, actor_b):
+                    pairs[self.pair_key(actor_a, actor_b)] = (actor_a, actor_b)
+
+        # dispatched in id order, so the handling order does not depend on the hash of the grid:
+        return [pairs[key] for key in sorted(pairs)]
+
+    @staticmethod
+    def pair_key(actor_a, actor_b):
+        if actor_a.id_number < actor_b.id_number:
+            return actor_a.id_number, actor_b.id_number
+        return actor_b.id_number, actor_a.id_number
+
+    def check(self, actor_list):
+        self.dispatch(self.broad_phase(actor_list))
+
+    def check_actor(self, actor, actor_list):
+        # only the pairs of actor, like the old per-actor Actor.check_collision_events
+        self.dispatch([pair for pair in self.broad_phase(actor_list) if actor in pair])
+
+    def dispatch(self, pairs):
+        self.candidate_pairs = len(pairs)
+        self.total_candidate_pairs += len(pairs)
+
+        # The lower id handles the pair first, so the player bounces off the side wall as thick as it was before the
+        # contact, and the wall grows after.
+        for actor_a, actor_b in pairs:
+            if actor_a.id_number > actor_b.id_number:
+                actor_a, actor_b = actor_b, actor_a
+            actor_a.collision(actor_b)
+            actor_b.collision(actor_a)
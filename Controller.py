@@ -1,15 +1,20 @@
-from random import gauss
+from NoiseSource import default_noise_source
 
 
 class Controller:
     def __init__(self,
                  screen_size,
                  tolerance=1,
-                 noise_std_deviation=0.01):
+                 noise_std_deviation=0.01,
+                 noise_source=None):
 
         self.screen_size = screen_size
         self.tolerance = tolerance
         self.noise_std_deviation = noise_std_deviation
+        if noise_source is None:
+            self.noise_source = default_noise_source
+        else:
+            self.noise_source = noise_source
 
     def close_loop_action_control(self, actor, reference, action_power=100):
         for i, actor_pos in enumerate(actor.pos):
@@ -20,6 +25,6 @@ class Controller:
 
     @property
     def noise(self):
-        return gauss(mu=0, sigma=self.noise_std_deviation)
+        return self.noise_source.normal(self.noise_std_deviation)
 
 
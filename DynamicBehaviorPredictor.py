@@ -1,9 +1,31 @@
-import tensorflow as tf
+import os
+import zipfile
+import zlib
 import numpy as np
 import threading
+import time
+from collections import deque
+from RingBuffer import RingBuffer
+from ReplayBuffer import ReplayBuffer
+from NumpyRNNCell import NumpyRNNCell
+from PredictorBackend import PredictorBackend, PredictorClient
+from CheckpointWriter import CheckpointWriter, load_weights
 
 
-class DynamicBehaviorPredictor:
+# TensorFlow is imported by the worker thread when the model is built, so importing this module (and opening the
+# game window) does not wait for it.
+tf = None
+
+
+def import_tensorflow():
+    global tf
+    if tf is None:
+        import tensorflow
+        tf = tensorflow
+    return tf
+
+
+class DynamicBehaviorPredictor(PredictorBackend):
     def __init__(self,
                  surface_size,
                  num_input=2,
@@ -12,11 +34,26 @@ class DynamicBehaviorPredictor:
                  num_neurons=100,
                  batch_size=1,
                  learning_rate=0.001,
-                 num_y_pred_output=10):
-
-        self.service_status = 'offline'
+                 num_y_pred_output=10,
+                 inference_mode='stateful',
+                 inference_engine='tensorflow',
+                 state_resync_period=None,
+                 queue_size=8,
+                 weight_sync_period=10,
+                 train_period=1,
+                 replay_capacity=10000,
+                 replay_eviction='fifo',
+                 replay_file_name=None,
+                 model_file_name=None,
+                 update_model=False,
+                 load_model=False,
+                 checkpoint_interval=10.0,
+                 max_clients=1,
+                 latency_window=1000):
+
+        super().__init__(surface_size,
+                         num_y_pred_output=num_y_pred_output)
 
-        self.surface_size = surface_size
         self.num_input = num_input
         self.input_length = input_length
         self.num_outputs = num_outputs
@@ -28,127 +65,489 @@ class DynamicBehaviorPredictor:
         self.y_true_print = [[self.surface_size[0]//2, self.surface_size[1]//2]]*self.input_length
         self.y_true_print = np.asarray(self.y_true_print).reshape(-1, self.input_length, self.num_outputs)
 
-        self.y_print = [[self.surface_size[0]//2, self.surface_size[1]//2]]*self.input_length
-        self.y_print = np.asarray(self.y_print).reshape(-1, self.input_length, self.num_outputs)
-
         self.x_input = [[[self.surface_size[0]//2, self.surface_size[1]//2]]]
         self.y_true_input = [[[self.surface_size[0]//2, self.surface_size[1]//2]]]
         self.y_pred_output = np.zeros(self.output_length)
-        self.num_y_pred_output = num_y_pred_output
 
-        self.update_model = False
-        self.load_model = False
+        # One predictor can serve up to max_clients aims, each registered on its own slot with its own input window,
+        # hidden state and trajectory. The samples of all slots are predicted together as one batch. Used directly,
+        # without register(), the predictor reads and writes slot 0.
+        self.max_clients = max_clients
+        self.num_clients = 0
+        self.open_clients = 0
+        self.started = False
+        self.y_print = np.repeat(self.y_print, self.max_clients, axis=0)
+
+        # 'stateful': carry the RNN hidden state forward one sample at a time and roll out the horizon from it.
+        # 'window': rerun the whole input window for every prediction step.
+        self.inference_mode = inference_mode
+        if state_resync_period is None:
+            self.state_resync_period = input_length
+        else:
+            self.state_resync_period = state_resync_period
+        self.resync_timer = np.zeros(self.max_clients, dtype=np.int64)
+        self.hidden_state = np.zeros((self.max_clients, self.num_neurons), dtype=np.float32)
+
+        # 'tensorflow': predict with the session on the double-buffered inference weights.
+        # 'numpy': predict with a NumpyRNNCell built from weights exported by the train worker.
+        self.inference_engine = inference_engine
+        self.numpy_cell = None
+
+        # x is the window before the newest sample and y_true the same window shifted by one step. The predict
+        # worker appends to the input buffer of the slot and, since every aim watches the same player, stores one
+        # window per tick in replay_buffer: the window of the newest slot of each round. Every train_period windows,
+        # that is samples of the player, the train worker fills train_batch under buffer_lock with the newest window
+        # plus batch_size - 1 replayed ones.
+        self.input_buffers = [RingBuffer(self.input_length + 1,
+                                         dimension=self.num_input,
+                                         init_value=[self.surface_size[0]//2, self.surface_size[1]//2])
+                              for _ in range(self.max_clients)]
+        self.newest_slot = 0
+        self.replay_buffer = ReplayBuffer(replay_capacity,
+                                          self.input_length + 1,
+                                          dimension=self.num_input,
+                                          eviction=replay_eviction,
+                                          file_name=replay_file_name)
+        self.train_period = train_period
+        self.train_batch = np.empty((self.batch_size, self.input_length + 1, self.num_input), dtype=np.float32)
+        self.buffer_lock = threading.Lock()
+
+        # Samples are handed to the worker through a bounded queue; when the worker falls behind the oldest
+        # sample of the same slot is dropped, so a slot never evicts the samples of another. The worker sleeps on data_condition until a sample arrives or close_app is set.
+        self.data_condition = threading.Condition()
+        self.sample_queue = deque(maxlen=queue_size*self.max_clients)
+        self.samples_received = 0
+        self.samples_consumed = 0
+        self.samples_dropped = 0
+
+        # y_print is only ever replaced whole, by the predict worker and by reset, one at a time under y_print_lock.
+        self.y_print_lock = threading.Lock()
+
+        # Training and inference run on separate workers. Inference reads one of two weight copies while the
+        # train worker refreshes the other every weight_sync_period steps and then flips active_weights.
+        self.train_condition = threading.Condition()
+        self.windows_available = 0
+        self.weight_sync_period = weight_sync_period
+        self.active_weights = 0
+        self.weight_locks = [threading.Lock(), threading.Lock()]
+        self.weight_version = 0
+        self.train_steps = 0
+        self.predict_steps = 0
+        self.loss_value = None
+
+        # wall time of the latest latency_window train and predict steps, in seconds (None keeps every step):
+        self.train_latency = deque(maxlen=latency_window)
+        self.predict_latency = deque(maxlen=latency_window)
+
+        # update_model: checkpoint the weights from a background writer at most every checkpoint_interval seconds.
+        # load_model: warm start from model_file_name when it exists.
+        self.update_model = update_model
+        self.load_model = load_model
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_writer = None
         self.close_app = False
-        self.received_data = False
-        self.clear_data_buffer = False
-
-        self.model_file_name = "./untitled_rnn_player_behavior_model"
+        self.clear_slots = set()
+        self.reinitialize_model = False
+
+        self.graph = None
+        self.sess = None
+        self.load_time = None
+        if model_file_name is None:
+            self.model_file_name = "./untitled_rnn_player_behavior_model.npz"
+        else:
+            self.model_file_name = model_file_name
         self.train_and_predict_thread_handler = threading.Thread(target=self.train_and_predict_thread)
+        self.predict_thread_handler = threading.Thread(target=self.predict_thread)
 
     def start_train_and_predict_thread(self, model_file_name=None):
         if model_file_name is not None:
             self.model_file_name = model_file_name
         self.train_and_predict_thread_handler.start()
 
-    def train_and_predict_thread(self):
-        # --------------------------------------------------------------------------------------------------------------
-        x = tf.placeholder(tf.float32, [None,
-                                        self.input_length,
-                                        self.num_input])
-
-        y_true = tf.placeholder(tf.float32, [None,
-                                             self.output_length,
-                                             self.num_outputs])
-
-        cell = tf.contrib.rnn.OutputProjectionWrapper(
+    def start(self):
+        # every registered client starts the predictor, the workers are only started once:
+        if not self.started:
+            self.started = True
+            self.start_train_and_predict_thread()
+
+    def register(self):
+        if self.num_clients == self.max_clients:
+            raise ValueError("all %d predictor slots are in use, raise max_clients" % self.max_clients)
+        slot = self.num_clients
+        self.num_clients += 1
+        self.open_clients += 1
+        return PredictorClient(self, slot)
+
+    def release(self):
+        # closes the predictor once every registered client is closed:
+        self.open_clients -= 1
+        if self.open_clients <= 0:
+            self.close()
+
+    def build_cell(self):
+        return tf.contrib.rnn.OutputProjectionWrapper(
             tf.nn.rnn_cell.BasicRNNCell(num_units=self.num_neurons,
                                         activation=tf.nn.selu),
             output_size=self.num_outputs)
 
-        y, states = tf.nn.dynamic_rnn(cell, x, dtype=tf.float32)
-
-        loss = tf.reduce_mean(tf.square(y - y_true))  # MSE
-        optimizer = tf.train.AdamOptimizer(learning_rate=self.learning_rate)
-        train = optimizer.minimize(loss)
-
-        init = tf.global_variables_initializer()
-
-        gpu_options = tf.GPUOptions(per_process_gpu_memory_fraction=0.75)
-
-        saver = tf.train.Saver()
+    def build_model(self, seed=None):
+        # Every predictor builds its own graph and runs its own session on it, so several predictors in one process
+        # (the games of a headless run, the sessions of an evaluation worker) never see each other's variables.
+        import_tensorflow()
+        self.graph = tf.Graph()
+        with self.graph.as_default():
+            if seed is not None:
+                tf.set_random_seed(seed)
+            self.build_graph()
+
+    def build_graph(self):
         # --------------------------------------------------------------------------------------------------------------
+        self.x = tf.placeholder(tf.float32, [None,
+                                             self.input_length,
+                                             self.num_input])
 
-        with tf.Session(config=tf.ConfigProto(gpu_options=gpu_options)) as sess:
-            sess.run(init)
-            print("init train_thread...")
-            x_input_buffer = [[self.surface_size[0]//2, self.surface_size[1]//2]]*self.input_length
-            y_input_buffer = [[self.surface_size[0]//2, self.surface_size[1]//2]]*self.input_length
-
-            self.service_status = 'online'
+        self.y_true = tf.placeholder(tf.float32, [None,
+                                                  self.output_length,
+                                                  self.num_outputs])
 
-            while not self.close_app:
-                # ======================================================================================================
-                if self.update_model is True:
-                    saver.save(sess, self.model_file_name)  # "./rnn_time_series_model"
+        with tf.variable_scope('train'):
+            cell = self.build_cell()
+            self.y, self.states = tf.nn.dynamic_rnn(cell, self.x, dtype=tf.float32)
 
-                if self.received_data is True:
-                    self.received_data = False
+        self.loss = tf.reduce_mean(tf.square(self.y - self.y_true))  # MSE
+        optimizer = tf.train.AdamOptimizer(learning_rate=self.learning_rate)
+        self.train = optimizer.minimize(self.loss)
 
-                    if self.clear_data_buffer is True:
-                        self.clear_data_buffer = False
-                        x_input_buffer = [[self.surface_size[0]//2, self.surface_size[1]//2]]*self.input_length
-                        y_input_buffer = [[self.surface_size[0]//2, self.surface_size[1]//2]]*self.input_length
+        self.train_variables = tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, scope='train/')
 
-                    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-                    # train:
-                    x_input_buffer_array = np.asarray(x_input_buffer).reshape(-1, self.input_length, self.num_input)
+        # --------------------------------------------------------------------------------------------------------------
+        # Single step graph for each weight copy: advance the hidden state with the newest sample, then feed each
+        # prediction back as the next input until the horizon is covered.
+        self.x_step = tf.placeholder(tf.float32, [None, self.num_input])
+        self.h_step = tf.placeholder(tf.float32, [None, self.num_neurons])
+
+        self.y_window = []
+        self.states_window = []
+        self.h_next = []
+        self.y_rollout = []
+        self.sync_weights = []
+        for i in range(len(self.weight_locks)):
+            with tf.variable_scope('inference_%d' % i):
+                cell = self.build_cell()
+                y_window, states_window = tf.nn.dynamic_rnn(cell, self.x, dtype=tf.float32)
+
+                y_step, h_next = cell(self.x_step, self.h_step)
+                y_rollout = [y_step]
+                h_rollout = h_next
+                for _ in range(self.num_y_pred_output - 1):
+                    y_step, h_rollout = cell(y_step, h_rollout)
+                    y_rollout.append(y_step)
+
+            inference_variables = tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, scope='inference_%d/' % i)
+
+            self.y_window.append(y_window)
+            self.states_window.append(states_window)
+            self.h_next.append(h_next)
+            self.y_rollout.append(tf.stack(y_rollout, axis=1))
+            self.sync_weights.append(tf.group(*[inference_variable.assign(train_variable)
+                                                for train_variable, inference_variable
+                                                in zip(self.train_variables, inference_variables)]))
+
+        self.init = tf.global_variables_initializer()
+        self.reinitialize = tf.variables_initializer([variable for variable in tf.global_variables()
+                                                      if not variable.name.startswith('inference_')])
+        # --------------------------------------------------------------------------------------------------------------
 
-                    y_input_buffer.append(self.x_input)
-                    del y_input_buffer[0]
-                    y_input_buffer_array = np.asarray(y_input_buffer).reshape(-1, self.input_length, self.num_outputs)
+    def train_and_predict_thread(self):
+        self.service_status = 'loading'
+        load_start = time.perf_counter()
 
-                    # --------------------------------------------------------------------------------------------------
-                    _, loss_value = sess.run(
-                        [train, loss],
-                        feed_dict={x: x_input_buffer_array,
-                                   y_true: y_input_buffer_array})
-                    # --------------------------------------------------------------------------------------------------
+        self.build_model()
 
-                    x_input_buffer.append(self.x_input)
-                    del x_input_buffer[0]
+        gpu_options = tf.GPUOptions(per_process_gpu_memory_fraction=0.75)
 
-                    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-                    # predict:
-                    buffer_array = y_input_buffer_array
+        with tf.Session(graph=self.graph, config=tf.ConfigProto(gpu_options=gpu_options)) as sess:
+            self.sess = sess
+            sess.run(self.init)
+            if self.load_model is True:
+                self.warm_start()
+            sess.run(self.sync_weights)
+            self.numpy_cell = NumpyRNNCell.from_weights(self.export_weights())
+            self.load_time = time.perf_counter() - load_start
+            print("init train_thread... (%.2f s to import TensorFlow and build the model)" % self.load_time)
+
+            if self.update_model is True:
+                self.checkpoint_writer = CheckpointWriter(self.model_file_name,
+                                                          min_interval=self.checkpoint_interval)
+                self.checkpoint_writer.start()
 
-                    for _ in range(self.num_y_pred_output):
-                        self.y_print = sess.run(y, feed_dict={x: buffer_array})
-                        buffer_array = self.y_print
-                # ======================================================================================================
+            self.service_status = 'online'
 
-    def set_data_to_train(self, input_data):
-        self.x_input = input_data
-        self.y_true_input = input_data
-        self.received_data = True
+            self.predict_thread_handler.start()
+            self.train_thread()
+            self.predict_thread_handler.join()
+
+            if self.checkpoint_writer is not None:
+                self.checkpoint_writer.submit(self.export_weights())
+                self.checkpoint_writer.close()
+
+            self.service_status = 'offline'
+
+    def train_thread(self):
+        while not self.close_app:
+            with self.train_condition:
+                while self.windows_available < self.train_period and not self.close_app:
+                    self.train_condition.wait()
+                if self.close_app:
+                    break
+                self.windows_available = 0
+
+            if self.reinitialize_model is True:
+                # fresh training weights and optimizer state, published to both inference copies:
+                self.reinitialize_model = False
+                self.sess.run(self.reinitialize)
+                with self.buffer_lock:
+                    self.replay_buffer.clear()
+                for _ in self.weight_locks:
+                    self.publish_weights()
+
+            # While the replay buffer holds fewer windows than the batch (right after a reinitialize cleared it) the
+            # batch is cut to the rows it filled, so rows left over from before are never trained on.
+            with self.buffer_lock:
+                np.copyto(self.train_batch[0], self.input_buffers[self.newest_slot].window[0])
+                batch_rows = 1 + self.replay_buffer.sample(self.train_batch, start=1)
+                train_batch = self.train_batch[:batch_rows]
+
+            # ==========================================================================================================
+            train_start = time.perf_counter()
+            _, self.loss_value = self.sess.run(
+                [self.train, self.loss],
+                feed_dict={self.x: train_batch[:, :-1],
+                           self.y_true: train_batch[:, 1:]})
+            self.train_steps += 1
+            self.train_latency.append(time.perf_counter() - train_start)
+
+            if self.train_steps % self.weight_sync_period == 0:
+                self.publish_weights()
+
+            if self.checkpoint_writer is not None and self.checkpoint_writer.due():
+                self.checkpoint_writer.submit(self.export_weights())
+            # ==========================================================================================================
+
+    def publish_weights(self):
+        if self.inference_engine == 'numpy':
+            self.numpy_cell = NumpyRNNCell.from_weights(self.export_weights())
+        else:
+            inactive_weights = 1 - self.active_weights
+            with self.weight_locks[inactive_weights]:
+                self.sess.run(self.sync_weights[inactive_weights])
+            self.active_weights = inactive_weights
+        self.weight_version += 1
+
+    def export_weights(self):
+        # cell kernel, cell bias, projection kernel, projection bias of the training graph:
+        return self.sess.run(self.train_variables)
+
+    def import_weights(self, weights):
+        for variable, value in zip(self.train_variables, weights):
+            variable.load(value, self.sess)
+
+    def warm_start(self):
+        if not os.path.exists(self.model_file_name):
+            print("no checkpoint at %s, starting from random weights" % self.model_file_name)
+            return False
+
+        # a truncated or corrupt checkpoint is treated like a missing one:
+        try:
+            weights = load_weights(self.model_file_name)
+        except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile, zlib.error) as error:
+            print("checkpoint %s could not be read (%s), starting from random weights" % (self.model_file_name, error))
+            return False
+
+        if [value.shape for value in weights] != [tuple(variable.shape.as_list())
+                                                  for variable in self.train_variables]:
+            print("checkpoint %s does not match the model, starting from random weights" % self.model_file_name)
+            return False
+
+        self.import_weights(weights)
+        print("warm start from %s" % self.model_file_name)
+        return True
+
+    def predict_thread(self):
+        while not self.close_app:
+            with self.data_condition:
+                while len(self.sample_queue) == 0 and not self.close_app:
+                    self.data_condition.wait()
+                if self.close_app:
+                    break
+                samples = list(self.sample_queue)
+                self.sample_queue.clear()
+                self.samples_consumed += len(samples)
+
+            # ==========================================================================================================
+            # The queued samples are split in rounds holding at most one sample per slot, oldest first; every round
+            # is predicted as one batch. A slot is only published with the round that holds its newest sample.
+            rounds = [[]]
+            newest_round = {}
+            for slot, sample in samples:
+                if slot in newest_round and newest_round[slot] == len(rounds) - 1:
+                    rounds.append([])
+                rounds[-1].append((slot, sample))
+                newest_round[slot] = len(rounds) - 1
+
+            for round_index, round_samples in enumerate(rounds):
+                slots = [slot for slot, _ in round_samples]
+
+                with self.buffer_lock:
+                    for slot, sample in round_samples:
+                        if slot in self.clear_slots:
+                            self.clear_slots.discard(slot)
+                            self.input_buffers[slot].reset([self.surface_size[0]//2, self.surface_size[1]//2])
+                            self.hidden_state[slot] = 0
+                            self.resync_timer[slot] = 0
+
+                        self.input_buffers[slot].append(sample)
+                        self.newest_slot = slot
+                    # a round holds the sample of the tick of every slot, stored once:
+                    self.replay_buffer.add(self.input_buffers[self.newest_slot].window[0])
+
+                with self.train_condition:
+                    self.windows_available += 1
+                    self.train_condition.notify()
+
+                # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+                # The stateful mode has to advance the hidden state with every sample, even while catching up.
+                if self.inference_mode == 'window':
+                    slots = [slot for slot in slots if newest_round[slot] == round_index]
+                if len(slots) > 0:
+                    predict_start = time.perf_counter()
+                    if self.inference_engine == 'numpy':
+                        y_print = self.predict_numpy(slots)
+                    else:
+                        y_print = self.predict_tensorflow(slots)
+
+                    # swapped in whole, so get_trajectory never sees a partially written trajectory; a slot reset
+                    # while it was predicted keeps the trajectory reset() published:
+                    with self.y_print_lock:
+                        published = [i for i, slot in enumerate(slots)
+                                     if newest_round[slot] == round_index and slot not in self.clear_slots]
+                        if len(published) > 0:
+                            next_y_print = self.y_print.copy()
+                            next_y_print[[slots[i] for i in published]] = y_print[published, -self.num_y_pred_output:]
+                            self.y_print = next_y_print
+                    self.predict_latency.append(time.perf_counter() - predict_start)
+
+                self.predict_steps += 1
+            # ==========================================================================================================
+
+    def stack_windows(self, slots):
+        return np.concatenate([self.input_buffers[slot].window for slot in slots])
+
+    def stack_last(self, slots):
+        return np.stack([self.input_buffers[slot].last for slot in slots])
+
+    def resync_due(self, slots):
+        # re-anchor the carried state on the window the model is trained on every state_resync_period samples:
+        resync_slots = [slot for slot in slots if self.resync_timer[slot] == 0]
+        for slot in slots:
+            if self.resync_timer[slot] > 0:
+                self.resync_timer[slot] -= 1
+            else:
+                self.resync_timer[slot] = self.state_resync_period
+        return resync_slots
+
+    def predict_tensorflow(self, slots):
+        active_weights = self.active_weights
+        with self.weight_locks[active_weights]:
+            if self.inference_mode == 'stateful':
+                resync_slots = self.resync_due(slots)
+                if len(resync_slots) > 0:
+                    self.hidden_state[resync_slots] = self.sess.run(
+                        self.states_window[active_weights],
+                        feed_dict={self.x: self.stack_windows(resync_slots)[:, :-1]})
+
+                self.hidden_state[slots], y_print = self.sess.run(
+                    [self.h_next[active_weights], self.y_rollout[active_weights]],
+                    feed_dict={self.x_step: self.stack_last(slots),
+                               self.h_step: self.hidden_state[slots]})
+
+            elif self.inference_mode == 'window':
+                y_print = self.stack_windows(slots)[:, 1:]
+                for _ in range(self.num_y_pred_output):
+                    y_print = self.sess.run(self.y_window[active_weights], feed_dict={self.x: y_print})
+
+        return y_print
+
+    def predict_numpy(self, slots):
+        numpy_cell = self.numpy_cell
+
+        if self.inference_mode == 'stateful':
+            resync_slots = self.resync_due(slots)
+            if len(resync_slots) > 0:
+                _, self.hidden_state[resync_slots] = numpy_cell.run(self.stack_windows(resync_slots)[:, :-1])
+
+            self.hidden_state[slots], y_print = numpy_cell.rollout(self.stack_last(slots),
+                                                                   self.hidden_state[slots],
+                                                                   self.num_y_pred_output)
+
+        elif self.inference_mode == 'window':
+            y_print = self.stack_windows(slots)[:, 1:]
+            for _ in range(self.num_y_pred_output):
+                y_print, _ = numpy_cell.run(y_print)
+
+        return y_print
+
+    def set_data_to_train(self, input_data, slot=0):
+        with self.data_condition:
+            if len(self.sample_queue) == self.sample_queue.maxlen:
+                self.samples_dropped += 1
+                queued_slots = [queued_slot for queued_slot, _ in self.sample_queue]
+                if slot in queued_slots:
+                    del self.sample_queue[queued_slots.index(slot)]
+            self.sample_queue.append((slot, input_data))
+            self.samples_received += 1
+            self.data_condition.notify()
+
+    def push_sample(self, sample, slot=0):
+        self.set_data_to_train(sample, slot=slot)
+
+    def get_trajectory(self, slot=0):
+        return self.y_print[slot][-self.num_y_pred_output:]
+
+    def reset(self, reinitialize=False, slot=None):
+        # The session and graph are kept; the input window and hidden state of the slot (of every slot when slot is
+        # None) are cleared by the predict worker and, with reinitialize, the train worker restarts from fresh weights.
+        # The sample counters are shared by every slot and only restart with a reset of the whole predictor.
+        slots = list(range(self.max_clients)) if slot is None else [slot]
+        with self.data_condition:
+            queued_samples = [(queued_slot, sample) for queued_slot, sample in self.sample_queue
+                              if queued_slot not in slots]
+            self.sample_queue.clear()
+            self.sample_queue.extend(queued_samples)
+            if slot is None:
+                self.samples_received = 0
+                self.samples_consumed = 0
+                self.samples_dropped = 0
+        with self.buffer_lock:
+            self.clear_slots.update(slots)
+        with self.y_print_lock:
+            next_y_print = self.y_print.copy()
+            next_y_print[slots] = [self.surface_size[0]//2, self.surface_size[1]//2]
+            self.y_print = next_y_print
+        if reinitialize is True:
+            self.reinitialize_model = True
+
+    def close(self):
+        self.close_app = True
 
     @property
-    def x_input(self):
-        return self._x_input
-
-    @x_input.setter
-    def x_input(self, value):
-        self._x_input = value
-        self.received_data = True
-
-
-
-
-
-
-
-
-
-
-
-
-
+    def close_app(self):
+        return self._close_app
+
+    @close_app.setter
+    def close_app(self, value):
+        with self.data_condition:
+            self._close_app = value
+            self.data_condition.notify_all()
+        with self.train_condition:
+            self.train_condition.notify_all()
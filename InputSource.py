@@ -0,0 +1,131 @@
+import random
+import pygame
+
+
+KEY_NAMES = ('up', 'down', 'left', 'right', 'space', 'backspace')
+
+
+class InputSource:
+    # Key state read by MachineRevolution and Player once per simulation step. poll() reads the device once per
+    # rendered frame, advance() moves to the next step, get_pressed() maps every name in KEY_NAMES to True/False.
+    def poll(self):
+        pass
+
+    def advance(self):
+        pass
+
+    def get_pressed(self):
+        return dict.fromkeys(KEY_NAMES, False)
+
+
+class KeyboardInputSource(InputSource):
+    # The keyboard state as of the last poll(), after the frame pumped the pygame events: every step of a frame sees
+    # the same keys.
+    def __init__(self):
+        self.key_codes = {'up': pygame.K_UP,
+                          'down': pygame.K_DOWN,
+                          'left': pygame.K_LEFT,
+                          'right': pygame.K_RIGHT,
+                          'space': pygame.K_SPACE,
+                          'backspace': pygame.K_BACKSPACE}
+        self.pressed = dict.fromkeys(KEY_NAMES, False)
+
+    def poll(self):
+        pressed = pygame.key.get_pressed()
+        self.pressed = {name: bool(pressed[key_code]) for name, key_code in self.key_codes.items()}
+
+    def get_pressed(self):
+        return dict(self.pressed)
+
+
+class ScriptedInputSource(InputSource):
+    # script: a sequence with the names of the keys held at each step, or a function of the step number returning
+    # them. Once a sequence runs out no key is held, unless loop is set.
+    def __init__(self,
+                 script,
+                 loop=False):
+
+        self.script = script
+        self.loop = loop
+        self.tick = -1
+
+    def advance(self):
+        self.tick += 1
+
+    def get_pressed(self):
+        pressed = dict.fromkeys(KEY_NAMES, False)
+
+        if callable(self.script):
+            keys = self.script(self.tick)
+        elif self.loop and len(self.script) > 0:
+            keys = self.script[self.tick % len(self.script)]
+        elif 0 <= self.tick < len(self.script):
+            keys = self.script[self.tick]
+        else:
+            keys = ()
+
+        for name in keys:
+            pressed[name] = True
+        return pressed
+
+
+class RandomInputSource(InputSource):
+    # Holds a random combination of arrow keys for a random number of steps between min_hold and max_hold.
+    def __init__(self,
+                 seed=None,
+                 min_hold=3,
+                 max_hold=15):
+
+        self.random = random.Random(seed)
+        self.min_hold = min_hold
+        self.max_hold = max_hold
+        self.hold_timer = 0
+        self.keys = ()
+
+    def advance(self):
+        if self.hold_timer > 0:
+            self.hold_timer -= 1
+        else:
+            self.keys = [name for name in ('up', 'down', 'left', 'right') if self.random.random() < 0.3]
+            self.hold_timer = self.random.randint(self.min_hold, self.max_hold)
+
+    def get_pressed(self):
+        pressed = dict.fromkeys(KEY_NAMES, False)
+        for name in self.keys:
+            pressed[name] = True
+        return pressed
+
+
+def encode_keys(pressed):
+    # bit i set when KEY_NAMES[i] is held
+    mask = 0
+    for bit, name in enumerate(KEY_NAMES):
+        if pressed[name]:
+            mask |= 1 << bit
+    return mask
+
+
+def decode_keys(mask):
+    return {name: bool(mask >> bit & 1) for bit, name in enumerate(KEY_NAMES)}
+
+
+class ReplayInputSource(InputSource):
+    # Replays key states recorded one bitmask per step (see encode_keys), e.g. the keys column of a
+    # TrajectoryReplayer. Once the recording runs out no key is held, unless loop is set.
+    def __init__(self,
+                 keys,
+                 loop=False):
+
+        self.keys = keys
+        self.loop = loop
+        self.tick = -1
+
+    def advance(self):
+        self.tick += 1
+
+    def get_pressed(self):
+        if self.loop and len(self.keys) > 0:
+            return decode_keys(int(self.keys[self.tick % len(self.keys)]))
+        elif 0 <= self.tick < len(self.keys):
+            return decode_keys(int(self.keys[self.tick]))
+        return dict.fromkeys(KEY_NAMES, False)
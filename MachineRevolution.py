@@ -1,11 +1,21 @@
-import pygame
 import time
+import pygame
 import threading
+import argparse
 import os
-import sys
-from random import gauss
 import Actor
 from Controller import Controller
+from InputSource import InputSource, KeyboardInputSource, RandomInputSource
+from PhysicsWorld import PhysicsWorld
+from CollisionSystem import CollisionSystem
+from AssetCache import asset_cache
+from NoiseSource import spawn_noise_sources
+from TrajectoryRecorder import TrajectoryRecorder, TrajectoryReplayer
+
+
+# Startup times are measured from the end of the imports above; TensorFlow is imported later, on the predictor worker,
+# which reports its own import and build time.
+launch_time = time.perf_counter()
 
 
 class MachineRevolution:
@@ -16,42 +26,109 @@ class MachineRevolution:
                  clock_rate=30,
                  pixel_meter=100,
                  surface_resistance=0.1,
-                 noise_std_deviation=0.01):
+                 noise_std_deviation=0.01,
+                 predictor_backend='rnn',
+                 predictor_options=None,
+                 restart_reinitialize_model=False,
+                 frame_rate=60,
+                 max_steps_per_frame=5,
+                 headless=False,
+                 input_source=None,
+                 physics_world=False,
+                 num_aims=1,
+                 dirty_rects=False,
+                 seed=None,
+                 record_directory=None):
+
+        # headless: no display, fonts or animation and no main_loop thread; the simulation is stepped as fast as
+        # possible by run_headless, driven by input_source instead of the keyboard.
+        self.headless = headless
+        if input_source is None and headless:
+            self.input_source = InputSource()
+        elif input_source is None:
+            self.input_source = KeyboardInputSource()
+        else:
+            self.input_source = input_source
 
         self.pygame = pygame
-        self.pygame.init()
-        self.pygame.font.init()
-
-        self.font_color = (175, 0, 0)
-        self.title_font = pygame.font.Font('font/CHECKBK0.TTF', 70)
-        self.title = self.title_font.render('Machine Revolution', False, self.font_color)
-        self.pwr_tensorflow_font = pygame.font.Font('font/CHECKBK0.TTF', 40)
-        self.pwr_tensorflow = self.pwr_tensorflow_font.render('AI powered by Google TensorFlow', False, self.font_color)
-        self.push_space_font = pygame.font.Font('font/CHECKBK0.TTF', 50)
-        self.push_space = self.push_space_font.render('Push Space', False, self.font_color)
-        self.push_backspace_font = pygame.font.Font('font/CHECKBK0.TTF', 50)
-        self.push_backspace = self.push_space_font.render('Push Backspace', False, self.font_color)
-        self.score_font = pygame.font.Font('font/CHECKBK0.TTF', 40)
         self.score_value = 0
-        self.score = self.score_font.render(str(self.score_value), False, self.font_color)
         self.start = 0
         self.end = 0
 
-        self.screen = pygame.display.set_mode(screen_size)
+        if self.headless:
+            self.screen = None
+        else:
+            self.pygame.init()
+            self.pygame.font.init()
+
+            self.font_color = (175, 0, 0)
+            self.title_font = pygame.font.Font('font/CHECKBK0.TTF', 70)
+            self.title = self.title_font.render('Machine Revolution', False, self.font_color)
+            self.pwr_tensorflow_font = pygame.font.Font('font/CHECKBK0.TTF', 40)
+            self.pwr_tensorflow = self.pwr_tensorflow_font.render('AI powered by Google TensorFlow', False,
+                                                                  self.font_color)
+            self.push_space_font = pygame.font.Font('font/CHECKBK0.TTF', 50)
+            self.push_space = self.push_space_font.render('Push Space', False, self.font_color)
+            self.push_backspace_font = pygame.font.Font('font/CHECKBK0.TTF', 50)
+            self.push_backspace = self.push_space_font.render('Push Backspace', False, self.font_color)
+            self.score_font = pygame.font.Font('font/CHECKBK0.TTF', 40)
+            self.score = self.score_font.render(str(self.score_value), False, self.font_color)
+
+            self.screen = pygame.display.set_mode(screen_size)
         self.screen_size = screen_size
 
         self.edge_width = edge_width
 
         self.main_state = 'start_state'
         self.close_app = False
+        self.first_frame_time = None
+        self.predictor_online_time = None
+        self.restart_reinitialize_model = restart_reinitialize_model
+        self.restart_time = None
         self.clock = pygame.time.Clock()
         self.clock_rate = clock_rate
 
+        # Fixed timestep: the simulation steps exactly clock_rate times per second of wall time while frames are
+        # rendered at up to frame_rate, interpolating actor positions between the last two simulation steps.
+        self.sample_period = 1/clock_rate
+        self.frame_rate = frame_rate
+        self.frame_period = 1/frame_rate
+        self.max_steps_per_frame = max_steps_per_frame
+        self.ticks = 0
+        self.death_tick = None
+        self.frames = 0
+        self.frame_time = 0
+        self.frame_overruns = 0
+        self.dropped_steps = 0
+
+        # dirty_rects: only the areas drawn in this frame or the last one are cleared and pushed to the display,
+        # instead of a fill and flip of the whole screen. Frames where a static layer actor (the side wall) changes,
+        # and every frame outside the play state, still fill and flip. pixels_pushed counts the pixels of the rects
+        # pushed in the last frame.
+        self.dirty_rect_rendering = dirty_rects
+        self.previous_dirty_rects = None
+        self.pixels_pushed = 0
+        self.total_pixels_pushed = 0
+        self.full_flips = 0
+
         self.surface_resistance = surface_resistance
         self.default_gravity = default_gravity
         self.noise_std_deviation = noise_std_deviation
         self.pixel_meter = pixel_meter
 
+        # seed: every noise stream (actor physics, controllers, aim shot timing, PhysicsWorld and the game itself) is
+        # spawned from it, so a seeded headless run with a seeded input source is reproducible.
+        self.seed = seed
+        self.noise_sources = spawn_noise_sources(seed)
+
+        # physics_world: integrate every actor with one vectorized PhysicsWorld update per tick.
+        if physics_world:
+            self.world = PhysicsWorld(seed=self.noise_sources['world'].random)
+        else:
+            self.world = None
+
+        self.collision_system = CollisionSystem()
+
         self.controller_list = []
         self.actor_list = []
 
@@ -66,6 +143,9 @@ class MachineRevolution:
                                             init_reaction_effect=True,
                                             init_pos=[dim_size//2 for dim_size in screen_size],
                                             sample_rate=clock_rate,
+                                            input_source=self.input_source,
+                                            noise_source=self.noise_sources['physics'],
+                                            world=self.world
                                             ))
 
         # --------------------------------------------------------------------------------------------------------------
@@ -81,47 +161,99 @@ class MachineRevolution:
                                               init_resistance=1,
                                               init_reaction_effect=True,
                                               default_gravity=default_gravity,
-                                              sample_rate=clock_rate))
+                                              sample_rate=clock_rate,
+                                              noise_source=self.noise_sources['physics'],
+                                              world=self.world))
 
         # --------------------------------------------------------------------------------------------------------------
-        # Aim:
-        self.controller_list.append(Controller(screen_size=self.screen_size,
-                                               noise_std_deviation=0.1))
-
-        self.actor_list.append(Actor.ComputerAim(surface=self.screen,
-                                                 surface_size=self.screen_size,
-                                                 surface_resistance=self.surface_resistance,
-                                                 id_number=2,
-                                                 category='computer_aim',
-                                                 color=(255, 0, 0),
-                                                 size=[7],
-                                                 mass=0.1,
-                                                 init_resistance=self.surface_resistance,
-                                                 init_reaction_effect=True,
-                                                 controller=self.controller_list[-1],
-                                                 init_pos=[dim_size for dim_size in screen_size],
-                                                 sample_rate=clock_rate,
-                                                 ai_target=self.actor_list[-2]
-                                                 ))
-
-        main_thread = threading.Thread(target=self.main_loop)
-        main_thread.start()
+        # Aims:
+        # The rnn aims share one predictor, which predicts the windows of all of them in one batch per tick.
+        # predictor_options override the options of ComputerAim.make_predictor, e.g. load_model and update_model.
+        if predictor_options is None:
+            predictor_options = {}
+        if predictor_backend == 'rnn' and num_aims > 1:
+            shared_predictor = Actor.ComputerAim.make_predictor(predictor_backend,
+                                                                self.screen_size,
+                                                                max_clients=num_aims,
+                                                                **predictor_options)
+        else:
+            shared_predictor = None
+
+        player = self.actor_list[0]
+        aim_start_corners = [[screen_size[0], screen_size[1]],
+                             [0, 0],
+                             [screen_size[0], 0],
+                             [0, screen_size[1]]]
+        for aim_index in range(num_aims):
+            self.controller_list.append(Controller(screen_size=self.screen_size,
+                                                   noise_std_deviation=0.1,
+                                                   noise_source=self.noise_sources['controller']))
+
+            self.actor_list.append(Actor.ComputerAim(surface=self.screen,
+                                                     surface_size=self.screen_size,
+                                                     surface_resistance=self.surface_resistance,
+                                                     id_number=2 + aim_index,
+                                                     category='computer_aim',
+                                                     color=(255, 0, 0),
+                                                     size=[7],
+                                                     mass=0.1,
+                                                     init_resistance=self.surface_resistance,
+                                                     init_reaction_effect=True,
+                                                     controller=self.controller_list[-1],
+                                                     init_pos=aim_start_corners[aim_index % len(aim_start_corners)],
+                                                     sample_rate=clock_rate,
+                                                     control_mode=predictor_backend,
+                                                     predictor=shared_predictor,
+                                                     predictor_options=predictor_options,
+                                                     ai_target=player,
+                                                     noise_source=self.noise_sources['physics'],
+                                                     timing_noise_source=self.noise_sources['aim_timing'],
+                                                     world=self.world
+                                                     ))
+
+        # record_directory: every simulation tick of the player and the prediction of the first aim are appended to a
+        # TrajectoryRecorder, replayable with TrajectoryReplayer.
+        if record_directory is None:
+            self.recorder = None
+        else:
+            self.recorder = TrajectoryRecorder(record_directory,
+                                               horizon=len(self.actor_list[2].ai_controller.get_trajectory()),
+                                               meta={'seed': seed,
+                                                     'sample_rate': clock_rate,
+                                                     'screen_size': list(screen_size),
+                                                     'predictor_backend': predictor_backend,
+                                                     'physics_world': physics_world,
+                                                     'num_aims': num_aims,
+                                                     'noise_std_deviation': noise_std_deviation})
+
+        if not self.headless:
+            main_thread = threading.Thread(target=self.main_loop)
+            main_thread.start()
 
     @property
     def noise(self):
-        return gauss(mu=0, sigma=self.noise_std_deviation)
+        return self.noise_sources['game'].normal(self.noise_std_deviation)
 
-    def check_key_events(self):
+    def close(self):
+        self.close_app = True
+        for actor in self.actor_list:
+            if actor.ai_action is True:
+                actor.ai_controller.close()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def pump_events(self):
+        # Once per rendered frame, however many simulation steps it runs (none included): handles the window events
+        # and takes the key state the steps of the frame read.
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                self.close_app = True
-                for actor in self.actor_list:
-                    if actor.ai_action is True:
-                        actor.ai_controller.close_app = True
+                self.close()
+        self.input_source.poll()
 
+    def check_key_events(self):
         if self.main_state == 'start_state':
-            pressed = pygame.key.get_pressed()
-            if pressed[pygame.K_SPACE]:
+            pressed = self.input_source.get_pressed()
+            if pressed['space']:
                 self.main_state = 'pre_play_state'
             for actor in self.actor_list:
                 actor.main_state = self.main_state
@@ -142,87 +274,320 @@ class MachineRevolution:
                 actor.main_state = self.main_state
 
         elif self.main_state == 'dead_state':
-            pressed = pygame.key.get_pressed()
-            if pressed[pygame.K_BACKSPACE]:
+            pressed = self.input_source.get_pressed()
+            if pressed['backspace']:
                 self.main_state = 'restart_state'
             for actor in self.actor_list:
                 actor.main_state = self.main_state
         elif self.main_state == 'restart_state':
-            os.execl(sys.executable, sys.executable, *sys.argv)
+            self.restart()
+
+    def restart(self):
+        # Resets actors, score and side wall in place; the predictor keeps its session and, unless
+        # restart_reinitialize_model is set, what it has learned.
+        restart_start = time.perf_counter()
+
+        for actor in self.actor_list:
+            actor.reset(reinitialize_model=self.restart_reinitialize_model)
+
+        self.score_value = 0
+        self.start = 0
+        self.end = 0
+        self.death_tick = None
+        self.main_state = 'start_state'
+        for actor in self.actor_list:
+            actor.main_state = self.main_state
+
+        self.restart_time = time.perf_counter() - restart_start
+        print("restarted in %.1f ms" % (1000*self.restart_time))
 
     def main_loop(self):
+        accumulator = 0
+        previous_time = time.perf_counter()
+
         while not self.close_app:
-            self.check_key_events()
-            self.score_update()
+            frame_start = time.perf_counter()
+            accumulator += frame_start - previous_time
+            previous_time = frame_start
+
+            self.pump_events()
+            if self.close_app:
+                break
+
+            steps = 0
+            while accumulator >= self.sample_period and steps < self.max_steps_per_frame:
+                self.simulation_step()
+                accumulator -= self.sample_period
+                steps += 1
+
+            if accumulator >= self.sample_period:
+                # too far behind to catch up: drop the backlog instead of spiralling
+                self.dropped_steps += int(accumulator/self.sample_period)
+                accumulator %= self.sample_period
 
             for actor in self.actor_list:
-                actor.machine_state()
+                actor.interpolation = accumulator/self.sample_period
 
-            if self.main_state == 'play_state':
-                for actor in self.actor_list:
-                    actor.inherent_natural_action_forces()
+            self.screen_update()
+            self.startup_time_update()
 
-                for actor in self.actor_list:
-                    actor.update_key_action()
+            self.frames += 1
+            self.frame_time = time.perf_counter() - frame_start
+            if self.frame_time > self.frame_period:
+                self.frame_overruns += 1
 
-                for actor in self.actor_list:
-                    actor.update_ai_action()
+            self.clock.tick(self.frame_rate)
 
-                for actor in self.actor_list:
-                    actor.update_controller_action()
+    def run_headless(self, max_ticks=100000, auto_start=True):
+        # Steps the simulation without display or sleeping until the player dies or max_ticks is reached.
+        if auto_start and self.main_state == 'start_state':
+            self.main_state = 'pre_play_state'
+            for actor in self.actor_list:
+                actor.main_state = self.main_state
+
+        run_start = time.perf_counter()
+        start_tick = self.ticks
+        while not self.close_app and self.death_tick is None and self.ticks - start_tick < max_ticks:
+            self.simulation_step()
+        wall_time = time.perf_counter() - run_start
+
+        if self.death_tick is None:
+            death_time = None
+        else:
+            death_time = self.death_tick*self.sample_period
+
+        return {'score': self.score_value,
+                'ticks': self.ticks - start_tick,
+                'death_tick': self.death_tick,
+                'death_time': death_time,
+                'wall_time': wall_time,
+                'ticks_per_second': (self.ticks - start_tick)/wall_time if wall_time > 0 else None}
+
+    def simulation_step(self):
+        self.ticks += 1
+        self.input_source.advance()
+        if self.recorder is not None and self.recorder.count == 0:
+            # a replay starts from the same state, see --replay
+            self.recorder.meta['start_state'] = self.main_state
+
+        for actor in self.actor_list:
+            actor.save_previous_state()
+
+        self.check_key_events()
+        self.score_update()
+
+        for actor in self.actor_list:
+            actor.machine_state()
+
+        if self.main_state == 'play_state':
+            for actor in self.actor_list:
+                actor.inherent_natural_action_forces()
 
+            for actor in self.actor_list:
+                actor.update_key_action()
+
+            for actor in self.actor_list:
+                actor.update_ai_action()
+
+            for actor in self.actor_list:
+                actor.update_controller_action()
+
+            if self.world is not None:
+                self.world.integrate()
+            else:
                 for actor in self.actor_list:
                     actor.update_pos()
 
-                for actor in self.actor_list:
-                    actor.check_collision_events(self.actor_list)
-            elif self.main_state == 'dead_state':
-                pass
+            self.collision_system.check(self.actor_list)
+        elif self.main_state == 'dead_state':
+            if self.death_tick is None:
+                self.death_tick = self.ticks
 
-            self.screen_update()
-            time.sleep(1/self.clock_rate)
+        # the recorder is closed with the game, which may happen within this tick (window closed)
+        if self.recorder is not None and not self.close_app:
+            self.record_step()
+
+    def record_step(self):
+        player = self.actor_list[0]
+        self.recorder.append(pos=player.pos,
+                             vel=player.vel,
+                             pressed=self.input_source.get_pressed(),
+                             prediction=self.actor_list[2].ai_controller.get_trajectory(),
+                             state=self.main_state)
 
     def screen_update(self):
+        if self.dirty_rect_rendering and self.main_state == 'play_state' and self.previous_dirty_rects is not None \
+                and all(actor.frame_key == actor.drawn_frame_key for actor in self.actor_list if actor.static_layer):
+            self.dirty_screen_update()
+            return
+
         self.screen.fill((0, 0, 0))
 
+        dirty_rects = []
+        for actor in self.actor_list:
+            actor_rects = actor.animation()
+            if not actor.static_layer:
+                dirty_rects.extend(actor_rects)
+
+        dirty_rects.extend(self.text_update())
+
+        self.pygame.display.flip()
+
+        self.previous_dirty_rects = dirty_rects
+        self.pixels_pushed = self.screen_size[0]*self.screen_size[1]
+        self.total_pixels_pushed += self.pixels_pushed
+        self.full_flips += 1
+
+    def dirty_screen_update(self):
+        screen_rect = self.screen.get_rect()
+
+        # clear what the last frame drew, then draw in the usual order, static layers only over the dirty areas:
+        for rect in self.previous_dirty_rects:
+            self.screen.fill((0, 0, 0), rect)
+
+        dirty_rects = []
         for actor in self.actor_list:
-            actor.animation()
+            if actor.static_layer:
+                for rect in self.previous_dirty_rects + dirty_rects:
+                    actor.redraw_area(rect)
+            else:
+                dirty_rects.extend(actor.animation())
+
+        dirty_rects.extend(self.text_update())
 
+        update_rects = [rect.clip(screen_rect) for rect in self.previous_dirty_rects + dirty_rects]
+        self.pygame.display.update(update_rects)
+
+        self.previous_dirty_rects = dirty_rects
+        self.pixels_pushed = sum(rect.width*rect.height for rect in update_rects)
+        self.total_pixels_pushed += self.pixels_pushed
+
+    def text_update(self):
         if self.main_state == 'start_state':
-            self.screen.blit(self.title, (self.screen_size[0]//2 - self.title.get_width()//2,
-                                          self.screen_size[1]//3))
-            self.screen.blit(self.push_space, (self.screen_size[0]//2 - self.push_space.get_width()//2,
-                                               self.screen_size[1]//2 + self.screen_size[1]//6))
-            self.screen.blit(self.pwr_tensorflow, (self.screen_size[0]//2 - self.pwr_tensorflow.get_width()//2,
-                                                   self.screen_size[1]//2))
+            return [self.screen.blit(self.title, (self.screen_size[0]//2 - self.title.get_width()//2,
+                                                  self.screen_size[1]//3)),
+                    self.screen.blit(self.push_space, (self.screen_size[0]//2 - self.push_space.get_width()//2,
+                                                       self.screen_size[1]//2 + self.screen_size[1]//6)),
+                    self.screen.blit(self.pwr_tensorflow,
+                                     (self.screen_size[0]//2 - self.pwr_tensorflow.get_width()//2,
+                                      self.screen_size[1]//2))]
         elif self.main_state == 'play_state':
             self.score = self.score_font.render(str(self.score_value), False, self.font_color)
-            self.screen.blit(self.score, (self.screen_size[0]//2 - self.score.get_width()//2,
-                                          self.screen_size[1]//20))
+            return [self.screen.blit(self.score, (self.screen_size[0]//2 - self.score.get_width()//2,
+                                                  self.screen_size[1]//20))]
         elif self.main_state == 'dead_state':
             self.score = self.score_font.render(str(self.score_value), False, self.font_color)
-            self.screen.blit(self.score, (self.screen_size[0]//2 - self.score.get_width()//2,
-                                          self.screen_size[1]//2 - self.score.get_height()//2))
-            self.screen.blit(self.push_backspace, (self.screen_size[0]//2 - self.push_backspace.get_width()//2,
-                                                   self.screen_size[1]//2 + self.screen_size[1]//6))
-
-        self.pygame.display.flip()
+            return [self.screen.blit(self.score, (self.screen_size[0]//2 - self.score.get_width()//2,
+                                                  self.screen_size[1]//2 - self.score.get_height()//2)),
+                    self.screen.blit(self.push_backspace,
+                                     (self.screen_size[0]//2 - self.push_backspace.get_width()//2,
+                                      self.screen_size[1]//2 + self.screen_size[1]//6))]
+        return []
+
+    def startup_time_update(self):
+        # seconds from launch_time to the first rendered frame and to every aim predictor reporting online:
+        if self.first_frame_time is None:
+            self.first_frame_time = time.perf_counter() - launch_time
+            print("start screen rendered %.3f s after launch" % self.first_frame_time)
+            asset_stats = asset_cache.stats()
+            print("%d images cached (%d loads, %d shared), %.1f ms to load, %.1f KiB"
+                  % (asset_stats['images'], asset_stats['loads'], asset_stats['hits'],
+                     1000*asset_stats['load_time'], asset_stats['memory']/1024))
+
+        if self.predictor_online_time is None:
+            if all(actor.ai_controller.status == 'online' for actor in self.actor_list if actor.ai_action is True):
+                self.predictor_online_time = time.perf_counter() - launch_time
+                print("predictor online %.3f s after launch" % self.predictor_online_time)
 
     def score_update(self):
         if self.main_state == 'start_state':
             self.start = 0
 
         elif self.main_state == 'pre_play_state':
-            self.start = time.time()
+            self.start = self.ticks
 
         elif self.main_state == 'play_state':
-            self.end = time.time()
-            self.score_value = int(100*(self.end - self.start))
+            self.end = self.ticks
+            self.score_value = int(100*(self.end - self.start)*self.sample_period)
 
 
 # ======================================================================================================================
 
-# screen_1 = MachineRevolution(screen_size=(1024, 768), noise_std_deviation=0.1)
-screen_1 = MachineRevolution(screen_size=(800, 600), 
-                             noise_std_deviation=0.1)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--headless', action='store_true', help='simulate games without display, as fast as possible')
+    parser.add_argument('--games', type=int, default=1, help='number of headless games')
+    parser.add_argument('--max_ticks', type=int, default=100000, help='tick limit per headless game')
+    parser.add_argument('--backend', default='rnn', help='aim predictor backend')
+    parser.add_argument('--physics_world', action='store_true', help='vectorized NumPy physics for all actors')
+    parser.add_argument('--aims', type=int, default=1, help='number of computer aims')
+    parser.add_argument('--dirty_rects', action='store_true', help='redraw and push only the changed screen areas')
+    parser.add_argument('--seed', type=int, default=None, help='noise seed, game i of a headless run uses seed + i')
+    parser.add_argument('--record', default=None, help='record directory, game i of a headless run in <record>/game-i')
+    parser.add_argument('--replay', default=None, help='rerun a seeded recording headless, same keys and settings')
+    parser.add_argument('--load_model', action='store_true', help='warm start the rnn from its checkpoint')
+    parser.add_argument('--update_model', action='store_true', help='checkpoint the rnn weights while playing')
+    args = parser.parse_args()
+
+    def reject(flags, mode):
+        # a flag set away from its default in a mode that ignores it is an error, not a silent no-op
+        for flag in flags:
+            if getattr(args, flag) != parser.get_default(flag):
+                parser.error("--%s does not apply to %s" % (flag, mode))
+
+    if args.replay is not None:
+        reject(['headless', 'games', 'max_ticks', 'backend', 'physics_world', 'aims', 'dirty_rects', 'seed',
+                'load_model', 'update_model'],
+               'a replay, which takes its settings from the recording')
+    elif args.headless:
+        reject(['dirty_rects'], 'a headless run')
+    else:
+        reject(['games', 'max_ticks'], 'the windowed game')
+    if args.backend == 'rnn':
+        predictor_options = {'load_model': args.load_model, 'update_model': args.update_model}
+    else:
+        reject(['load_model', 'update_model'], 'the %s backend' % args.backend)
+        predictor_options = None
+
+    if args.replay is not None:
+        replayer = TrajectoryReplayer(args.replay)
+        replay_game = MachineRevolution(screen_size=replayer.meta['screen_size'],
+                                        clock_rate=replayer.meta['sample_rate'],
+                                        noise_std_deviation=replayer.meta['noise_std_deviation'],
+                                        predictor_backend=replayer.meta['predictor_backend'],
+                                        headless=True,
+                                        input_source=replayer.input_source(),
+                                        physics_world=replayer.meta['physics_world'],
+                                        num_aims=replayer.meta['num_aims'],
+                                        seed=replayer.meta['seed'],
+                                        record_directory=args.record)
+        print(replay_game.run_headless(max_ticks=len(replayer),
+                                       auto_start=replayer.meta.get('start_state') != 'start_state'))
+        replay_game.close()
+    elif args.headless:
+        for game in range(args.games):
+            headless_game = MachineRevolution(screen_size=(800, 600),
+                                              noise_std_deviation=0.1,
+                                              predictor_backend=args.backend,
+                                              predictor_options=predictor_options,
+                                              headless=True,
+                                              input_source=RandomInputSource(seed=game),
+                                              physics_world=args.physics_world,
+                                              num_aims=args.aims,
+                                              seed=None if args.seed is None else args.seed + game,
+                                              record_directory=None if args.record is None
+                                              else os.path.join(args.record, 'game-%d' % game))
+            print(headless_game.run_headless(max_ticks=args.max_ticks))
+            headless_game.close()
+    else:
+        # screen_1 = MachineRevolution(screen_size=(1024, 768), noise_std_deviation=0.1)
+        screen_1 = MachineRevolution(screen_size=(800, 600),
+                                     noise_std_deviation=0.1,
+                                     predictor_backend=args.backend,
+                                     predictor_options=predictor_options,
+                                     physics_world=args.physics_world,
+                                     num_aims=args.aims,
+                                     dirty_rects=args.dirty_rects,
+                                     seed=args.seed,
+                                     record_directory=args.record)
 
@@ -0,0 +1,37 @@
+import numpy as np
+
+
+# Independent streams spawned from one seed by spawn_noise_sources; the draws of one subsystem do not shift the
+# samples of another.
+NOISE_STREAMS = ('physics', 'controller', 'aim_timing', 'world', 'game')
+
+
+class NoiseSource:
+    # Standard normal samples from a seeded NumPy generator, generated block_size at a time and handed out one by one
+    # as Python floats. seed: anything np.random.default_rng accepts, None for an unseeded source.
+    def __init__(self,
+                 seed=None,
+                 block_size=4096):
+
+        self.random = np.random.default_rng(seed)
+        self.block_size = block_size
+        self.block = []
+        self.index = 0
+
+    def normal(self, sigma=1.0):
+        if self.index == len(self.block):
+            self.block = self.random.standard_normal(self.block_size).tolist()
+            self.index = 0
+        value = self.block[self.index]
+        self.index += 1
+        return sigma*value
+
+
+def spawn_noise_sources(seed=None, names=NOISE_STREAMS, block_size=4096):
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(names))
+    return {name: NoiseSource(seed_sequence, block_size=block_size)
+            for name, seed_sequence in zip(names, seed_sequences)}
+
+
+# used by actors and controllers created without a noise source:
+default_noise_source = NoiseSource()
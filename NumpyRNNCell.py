@@ -0,0 +1,114 @@
+import numpy as np
+
+
+SELU_ALPHA = 1.6732632423543772848170429916717
+SELU_SCALE = 1.0507009873554804934193349852946
+
+
+def selu(value):
+    return SELU_SCALE*np.where(value > 0, value, SELU_ALPHA*np.expm1(np.minimum(value, 0)))
+
+
+class NumpyRNNCell:
+    # Forward pass of OutputProjectionWrapper(BasicRNNCell(activation=selu)):
+    #   h' = selu([x, h]·kernel + bias),  y = h'·projection_kernel + projection_bias
+    def __init__(self,
+                 kernel,
+                 bias,
+                 projection_kernel,
+                 projection_bias):
+
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.projection_kernel = np.asarray(projection_kernel, dtype=np.float32)
+        self.projection_bias = np.asarray(projection_bias, dtype=np.float32)
+
+        self.num_neurons = self.bias.shape[0]
+        self.num_input = self.kernel.shape[0] - self.num_neurons
+        self.num_outputs = self.projection_bias.shape[0]
+
+        # [x, h]·kernel is evaluated as x·input_kernel + h·state_kernel to avoid the concatenation.
+        self.input_kernel = np.ascontiguousarray(self.kernel[:self.num_input])
+        self.state_kernel = np.ascontiguousarray(self.kernel[self.num_input:])
+
+    @classmethod
+    def from_weights(cls, weights):
+        # weights in the order of the TF trainable variables: cell kernel, cell bias, projection kernel, bias.
+        return cls(*weights)
+
+    @property
+    def weights(self):
+        return [self.kernel, self.bias, self.projection_kernel, self.projection_bias]
+
+    def zero_state(self, batch_size=1):
+        return np.zeros((batch_size, self.num_neurons), dtype=np.float32)
+
+    def step(self, x, h):
+        h = selu(np.dot(x, self.input_kernel) + np.dot(h, self.state_kernel) + self.bias)
+        return np.dot(h, self.projection_kernel) + self.projection_bias, h
+
+    def run(self, x, h=None):
+        # x: (batch, time, num_input) -> outputs (batch, time, num_outputs) and the final hidden state.
+        if h is None:
+            h = self.zero_state(x.shape[0])
+        y = np.empty((x.shape[0], x.shape[1], self.num_outputs), dtype=np.float32)
+        for t in range(x.shape[1]):
+            y[:, t], h = self.step(x[:, t], h)
+        return y, h
+
+    def rollout(self, x, h, horizon):
+        # Advances h with x, then feeds every prediction back as the next input. Returns the state after x and
+        # the (batch, horizon, num_outputs) trajectory, matching the y_rollout graph of DynamicBehaviorPredictor.
+        y_rollout = np.empty((x.shape[0], horizon, self.num_outputs), dtype=np.float32)
+        y_rollout[:, 0], h_next = self.step(x, h)
+        h_rollout = h_next
+        for i in range(1, horizon):
+            y_rollout[:, i], h_rollout = self.step(y_rollout[:, i - 1], h_rollout)
+        return h_next, y_rollout
+
+
+# tf.nn.selu of SELU_REFERENCE_INPUT, as computed by TensorFlow:
+SELU_REFERENCE_INPUT = [-3.0, -1.0, -0.5, 0.0, 0.5, 1.0, 3.0]
+SELU_REFERENCE_OUTPUT = [-1.6705687046051025, -1.1113307476043701, -0.6917581558227539, 0.0,
+                         0.5253505110740662, 1.0507010221481323, 3.1521029472351074]
+
+
+def check_numpy_cell(num_input=2, num_neurons=16, num_outputs=2, batch_size=3, length=20, horizon=5, seed=0):
+    # Checks that run without TensorFlow: selu against TensorFlow's values, the [x, h] kernel layout of BasicRNNCell
+    # against an explicit concatenation, run against stepping sample by sample, and rollout against run fed with its
+    # own predictions. benchmark_inference.py checks the cell against the TF graph itself.
+    np.testing.assert_allclose(selu(np.asarray(SELU_REFERENCE_INPUT, dtype=np.float32)), SELU_REFERENCE_OUTPUT,
+                               rtol=1e-6, atol=1e-6)
+
+    random = np.random.RandomState(seed)
+    cell = NumpyRNNCell(random.normal(0, 0.3, (num_input + num_neurons, num_neurons)),
+                        random.normal(0, 0.1, num_neurons),
+                        random.normal(0, 0.3, (num_neurons, num_outputs)),
+                        random.normal(0, 0.1, num_outputs))
+    x = random.normal(0, 1, (batch_size, length, num_input)).astype(np.float32)
+    h = random.normal(0, 1, (batch_size, num_neurons)).astype(np.float32)
+
+    h_expected = selu(np.dot(np.concatenate([x[:, 0], h], axis=1), cell.kernel) + cell.bias)
+    y_expected = np.dot(h_expected, cell.projection_kernel) + cell.projection_bias
+    y_step, h_step = cell.step(x[:, 0], h)
+    np.testing.assert_allclose(h_step, h_expected, rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(y_step, y_expected, rtol=1e-5, atol=1e-5)
+
+    y_run, h_run = cell.run(x, h)
+    h_loop = h
+    for t in range(length):
+        y_loop, h_loop = cell.step(x[:, t], h_loop)
+        np.testing.assert_array_equal(y_run[:, t], y_loop)
+    np.testing.assert_array_equal(h_run, h_loop)
+
+    h_next, y_rollout = cell.rollout(x[:, 0], h, horizon)
+    y_fed, h_fed = cell.run(x[:, :1], h)
+    np.testing.assert_array_equal(h_next, h_fed)
+    for i in range(horizon):
+        np.testing.assert_array_equal(y_rollout[:, i], y_fed[:, 0])
+        y_fed, h_fed = cell.run(y_fed, h_fed)
+
+
+if __name__ == '__main__':
+    check_numpy_cell()
+    print("NumpyRNNCell checks ok")
@@ -0,0 +1,86 @@
+import numpy as np
+
+
+class PhysicsWorld:
+    # Struct-of-arrays store of the kinematic state of every registered actor. integrate() performs the same update as
+    # Actor.update_pos for all actors at once; actors read and write their row through properties.
+    def __init__(self,
+                 dimension=2,
+                 capacity=16,
+                 seed=None):
+
+        self.dimension = dimension
+        self.capacity = 0
+        self.size = 0
+        self.random = np.random.default_rng(seed)
+
+        self.force = np.zeros((0, self.dimension))
+        self.acl = np.zeros((0, self.dimension))
+        self.vel = np.zeros((0, self.dimension))
+        self.pos = np.zeros((0, self.dimension), dtype=np.int64)
+        self.mass = np.ones(0)
+        self.resistance = np.zeros(0)
+        self.sample_period = np.zeros(0)
+        self.pixel_meter = np.zeros(0)
+        self.noise_std_deviation = np.zeros(0)
+
+        self.reserve(capacity)
+
+    def reserve(self, capacity):
+        # Grows every array; actors index the arrays on each access, so growing does not invalidate them.
+        if capacity <= self.capacity:
+            return
+        for name in ('force', 'acl', 'vel', 'pos', 'mass', 'resistance',
+                     'sample_period', 'pixel_meter', 'noise_std_deviation'):
+            old_array = getattr(self, name)
+            new_array = np.zeros((capacity,) + old_array.shape[1:], dtype=old_array.dtype)
+            new_array[:self.size] = old_array[:self.size]
+            setattr(self, name, new_array)
+        self.capacity = capacity
+
+    def add(self,
+            mass=1,
+            resistance=0,
+            sample_period=1/30,
+            pixel_meter=10,
+            noise_std_deviation=0,
+            force=None,
+            vel=None,
+            pos=None):
+
+        if self.size == self.capacity:
+            self.reserve(2*self.capacity)
+
+        index = self.size
+        self.size += 1
+
+        self.mass[index] = mass
+        self.resistance[index] = resistance
+        self.sample_period[index] = sample_period
+        self.pixel_meter[index] = pixel_meter
+        self.noise_std_deviation[index] = noise_std_deviation
+        self.force[index] = 0 if force is None else force
+        self.vel[index] = 0 if vel is None else vel
+        self.pos[index] = 0 if pos is None else pos
+        self.acl[index] = self.force[index]/mass
+        return index
+
+    def add_actor(self, actor):
+        return self.add(mass=actor.mass,
+                        resistance=actor.resistance,
+                        sample_period=actor.sample_period,
+                        pixel_meter=actor.pixel_meter,
+                        noise_std_deviation=actor.noise_std_deviation,
+                        force=actor.action_force_input,
+                        vel=actor.vel,
+                        pos=actor.pos)
+
+    def integrate(self):
+        n = self.size
+        sample_period = self.sample_period[:n, None]
+
+        np.divide(self.force[:n], self.mass[:n, None], out=self.acl[:n])
+        noise = self.random.standard_normal((n, self.dimension))*self.noise_std_deviation[:n, None]
+        self.vel[:n] += self.acl[:n]*sample_period - self.vel[:n]*self.resistance[:n, None] + noise
+        # astype truncates toward zero like the int() of Actor.update_pos:
+        self.pos[:n] += (self.vel[:n]*sample_period*self.pixel_meter[:n, None]).astype(np.int64)
@@ -0,0 +1,196 @@
+import importlib
+import numpy as np
+from RingBuffer import RingBuffer
+
+
+# name: (module, class, default options). Modules are imported on first use so a backend's dependencies are only
+# loaded when that backend is selected.
+PREDICTOR_BACKENDS = {
+    'rnn': ('DynamicBehaviorPredictor', 'DynamicBehaviorPredictor', {}),
+    'constant_velocity': ('PredictorBackend', 'KinematicPredictor', {'order': 1}),
+    'constant_acceleration': ('PredictorBackend', 'KinematicPredictor', {'order': 2}),
+    'kalman': ('PredictorBackend', 'KalmanPredictor', {}),
+}
+
+
+def make_predictor(name, **kwargs):
+    if name not in PREDICTOR_BACKENDS:
+        raise ValueError("unknown predictor backend: %s (available: %s)" % (name, ', '.join(PREDICTOR_BACKENDS)))
+    module_name, class_name, options = PREDICTOR_BACKENDS[name]
+    predictor_class = getattr(importlib.import_module(module_name), class_name)
+    return predictor_class(**dict(options, **kwargs))
+
+
+class PredictorBackend:
+    # Interface shared by every aim predictor: start, push_sample, get_trajectory, status, reset and close.
+    # get_trajectory returns the next num_y_pred_output predicted positions, the last one being the aim reference.
+    def __init__(self,
+                 surface_size,
+                 num_y_pred_output=5):
+
+        self.service_status = 'offline'
+
+        self.surface_size = surface_size
+        self.num_y_pred_output = num_y_pred_output
+        self.samples_received = 0
+
+        self.y_print = [[self.surface_size[0]//2, self.surface_size[1]//2]]*self.num_y_pred_output
+        self.y_print = np.asarray(self.y_print, dtype=np.float32).reshape(-1, self.num_y_pred_output, 2)
+
+    def start(self):
+        self.service_status = 'online'
+
+    def push_sample(self, sample):
+        self.samples_received += 1
+
+    def get_trajectory(self):
+        return self.y_print[-1][-self.num_y_pred_output:]
+
+    @property
+    def status(self):
+        return self.service_status
+
+    def reset(self, reinitialize=False):
+        # Forget the current trajectory; reinitialize also discards what the backend has learned.
+        self.samples_received = 0
+        self.y_print[...] = [self.surface_size[0]//2, self.surface_size[1]//2]
+
+    def close(self):
+        self.service_status = 'offline'
+
+
+class KinematicPredictor(PredictorBackend):
+    # Extrapolates the last samples with constant velocity (order=1) or constant acceleration (order=2).
+    # The finite differences are smoothed with an exponential filter of factor `smoothing`.
+    def __init__(self,
+                 surface_size,
+                 num_y_pred_output=5,
+                 order=1,
+                 smoothing=0.5):
+
+        super().__init__(surface_size,
+                         num_y_pred_output=num_y_pred_output)
+
+        self.order = order
+        self.smoothing = smoothing
+
+        self.history = RingBuffer(3, dimension=2, init_value=[self.surface_size[0]//2, self.surface_size[1]//2])
+        self.velocity = np.zeros(2, dtype=np.float32)
+        self.acceleration = np.zeros(2, dtype=np.float32)
+
+        steps = np.arange(1, self.num_y_pred_output + 1, dtype=np.float32).reshape(-1, 1)
+        self.velocity_steps = steps
+        self.acceleration_steps = steps*(steps + 1)/2
+
+    def reset(self, reinitialize=False):
+        super().reset(reinitialize=reinitialize)
+        self.history.reset([self.surface_size[0]//2, self.surface_size[1]//2])
+        self.velocity[...] = 0
+        self.acceleration[...] = 0
+
+    def push_sample(self, sample):
+        super().push_sample(sample)
+
+        if self.samples_received == 1:
+            self.history.reset(sample)
+        self.history.append(sample)
+        pos = self.history.window[0]
+
+        self.velocity += self.smoothing*((pos[2] - pos[1]) - self.velocity)
+        if self.order > 1:
+            self.acceleration += self.smoothing*((pos[2] - 2*pos[1] + pos[0]) - self.acceleration)
+
+        self.y_print[0] = pos[2] + self.velocity_steps*self.velocity + self.acceleration_steps*self.acceleration
+
+
+class KalmanPredictor(PredictorBackend):
+    # Constant acceleration Kalman filter on position samples, one tick per step. Both axes share the same model,
+    # so they share one covariance matrix and the state is stored as a (3, 2) [pos, vel, acl] x [x, y] matrix.
+    def __init__(self,
+                 surface_size,
+                 num_y_pred_output=5,
+                 process_noise=1.0,
+                 measurement_noise=4.0):
+
+        super().__init__(surface_size,
+                         num_y_pred_output=num_y_pred_output)
+
+        self.transition = np.array([[1, 1, 0.5],
+                                    [0, 1, 1],
+                                    [0, 0, 1]])
+        self.process_noise = process_noise*np.array([[1/20, 1/8, 1/6],
+                                                     [1/8, 1/3, 1/2],
+                                                     [1/6, 1/2, 1]])
+        self.measurement_noise = measurement_noise
+
+        # position rows of transition^k for k = 1..num_y_pred_output:
+        self.prediction_rows = np.empty((self.num_y_pred_output, 3))
+        transition_k = np.eye(3)
+        for k in range(self.num_y_pred_output):
+            transition_k = np.dot(self.transition, transition_k)
+            self.prediction_rows[k] = transition_k[0]
+
+        self.reset_state()
+
+    def reset_state(self):
+        self.state = np.zeros((3, 2))
+        self.state[0] = [self.surface_size[0]//2, self.surface_size[1]//2]
+        self.covariance = np.diag([self.measurement_noise, 100.0, 100.0])
+
+    def reset(self, reinitialize=False):
+        super().reset(reinitialize=reinitialize)
+        self.reset_state()
+
+    def push_sample(self, sample):
+        super().push_sample(sample)
+
+        if self.samples_received == 1:
+            self.state[0] = sample
+
+        # predict:
+        self.state = np.dot(self.transition, self.state)
+        self.covariance = np.dot(np.dot(self.transition, self.covariance), self.transition.T) + self.process_noise
+
+        # update with the measured position:
+        innovation = np.asarray(sample, dtype=np.float64) - self.state[0]
+        gain = self.covariance[:, 0]/(self.covariance[0, 0] + self.measurement_noise)
+        self.state += np.outer(gain, innovation)
+        self.covariance -= np.outer(gain, self.covariance[0])
+
+        self.y_print[0] = np.dot(self.prediction_rows, self.state)
+
+
+class PredictorClient(PredictorBackend):
+    # One slot of a predictor shared by several aims, as returned by its register(). Every call is forwarded to the
+    # shared predictor with the slot of this client.
+    def __init__(self,
+                 service,
+                 slot):
+
+        super().__init__(service.surface_size,
+                         num_y_pred_output=service.num_y_pred_output)
+
+        self.service = service
+        self.slot = slot
+
+    def start(self):
+        self.service.start()
+
+    def push_sample(self, sample):
+        super().push_sample(sample)
+        self.service.push_sample(sample, slot=self.slot)
+
+    def get_trajectory(self):
+        return self.service.get_trajectory(slot=self.slot)
+
+    @property
+    def status(self):
+        return self.service.status
+
+    def reset(self, reinitialize=False):
+        super().reset(reinitialize=reinitialize)
+        self.service.reset(reinitialize=reinitialize, slot=self.slot)
+
+    def close(self):
+        super().close()
+        self.service.release()
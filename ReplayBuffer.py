@@ -0,0 +1,72 @@
+import numpy as np
+
+
+# 'fifo' overwrites the oldest window, 'random' a uniformly chosen one and 'reservoir' keeps a uniform sample of every
+# window ever added.
+EVICTION_POLICIES = ('fifo', 'random', 'reservoir')
+
+
+class ReplayBuffer:
+    def __init__(self,
+                 capacity,
+                 window_length,
+                 dimension=2,
+                 eviction='fifo',
+                 file_name=None,
+                 dtype=np.float32,
+                 seed=None):
+
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError("unknown eviction policy: %s (available: %s)" % (eviction, ', '.join(EVICTION_POLICIES)))
+
+        self.capacity = capacity
+        self.window_length = window_length
+        self.dimension = dimension
+        self.eviction = eviction
+        self.file_name = file_name
+
+        # Windows are stored in RAM, or in a memory-mapped .npy scratch file when file_name is given so large
+        # capacities do not have to stay resident.
+        if self.file_name is None:
+            self.data = np.zeros((self.capacity, self.window_length, self.dimension), dtype=dtype)
+        else:
+            self.data = np.lib.format.open_memmap(self.file_name,
+                                                  mode='w+',
+                                                  dtype=dtype,
+                                                  shape=(self.capacity, self.window_length, self.dimension))
+
+        self.random = np.random.RandomState(seed)
+        self.size = 0
+        self.head = 0
+        self.windows_added = 0
+
+    def add(self, window):
+        if self.size < self.capacity:
+            index = self.size
+            self.size += 1
+        elif self.eviction == 'fifo':
+            index = self.head
+            self.head = (self.head + 1) % self.capacity
+        elif self.eviction == 'random':
+            index = self.random.randint(self.capacity)
+        else:
+            index = self.random.randint(self.windows_added + 1)
+
+        if index < self.capacity:
+            self.data[index] = window
+        self.windows_added += 1
+
+    def sample(self, out, start=0):
+        # Fills rows of out from start on with windows drawn uniformly, with replacement, and returns how many: never
+        # more than the windows stored, the rows after them being left untouched.
+        rows = min(len(out) - start, self.size)
+        if rows <= 0:
+            return 0
+        indices = self.random.randint(self.size, size=rows)
+        np.take(self.data[:self.size], indices, axis=0, out=out[start:start + rows])
+        return rows
+
+    def clear(self):
+        self.size = 0
+        self.head = 0
+        self.windows_added = 0
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class RingBuffer:
+    def __init__(self,
+                 length,
+                 dimension=2,
+                 init_value=0,
+                 dtype=np.float32,
+                 batch_size=1):
+
+        self.length = length
+        self.batch_size = batch_size
+        self.dimension = dimension
+        self.dtype = dtype
+
+        # Every sample is written twice, at head and head + length, so the last
+        # `length` samples are always one contiguous slice of the array. A batched buffer keeps batch_size streams
+        # advancing together, one sample each per append.
+        self.data = np.empty((self.batch_size, 2*self.length, self.dimension), dtype=self.dtype)
+        self.head = 0
+        self.reset(init_value)
+
+    def reset(self, value=0, rows=None):
+        # rows: only refill these streams of a batched buffer (indices or a boolean mask), the shared head is kept
+        if rows is None:
+            self.data[...] = value
+            self.head = 0
+        else:
+            self.data[rows] = value
+
+    def append(self, sample):
+        # sample: (dimension,), or (batch_size, dimension) for a batched buffer
+        self.data[:, self.head] = sample
+        self.data[:, self.head + self.length] = sample
+        self.head += 1
+        if self.head == self.length:
+            self.head = 0
+
+    @property
+    def window(self):
+        return self.data[:, self.head:self.head + self.length]
+
+    @property
+    def last(self):
+        return self.data[0, self.head + self.length - 1]
@@ -0,0 +1,167 @@
+import glob
+import json
+import os
+import numpy as np
+from InputSource import encode_keys, ReplayInputSource
+
+
+# values of the state column, the MachineRevolution main_state at the end of the tick:
+MAIN_STATES = ('start_state', 'pre_play_state', 'play_state', 'dead_state', 'restart_state')
+
+
+def recording_columns(horizon):
+    # name: (dtype, shape of one row). Every column is a raw little-endian file <name>.bin, one row per tick.
+    return {'pos': ('<i4', (2,)),
+            'vel': ('<f4', (2,)),
+            'keys': ('u1', ()),
+            'prediction': ('<f4', (horizon, 2)),
+            'state': ('u1', ())}
+
+
+def find_recordings(paths):
+    # every path is a recording directory or a directory of recordings, searched recursively
+    recordings = []
+    for path in paths:
+        if os.path.exists(os.path.join(path, 'meta.json')):
+            recordings.append(path)
+        else:
+            recordings.extend(sorted(os.path.dirname(meta_path)
+                                     for meta_path in glob.glob(os.path.join(path, '**', 'meta.json'),
+                                                                recursive=True)))
+    return recordings
+
+
+class TrajectoryRecorder:
+    # Appends one row per simulation tick to a recording directory: the player position and velocity, the held keys
+    # as a bitmask of InputSource.KEY_NAMES, the trajectory predicted by the aim and the game state, all as of the end
+    # of the tick. Rows are buffered chunk_size at a time; meta.json, with the row count and the column layout, is
+    # written by close(), so a recording is only complete once closed.
+    def __init__(self,
+                 directory,
+                 horizon=5,
+                 chunk_size=1024,
+                 meta=None):
+
+        self.directory = directory
+        self.horizon = horizon
+        self.chunk_size = chunk_size
+        self.meta = {} if meta is None else dict(meta)
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.columns = recording_columns(horizon)
+        self.chunk = {name: np.zeros((chunk_size,) + shape, dtype=dtype)
+                      for name, (dtype, shape) in self.columns.items()}
+        self.files = {name: open(os.path.join(self.directory, name + '.bin'), 'wb') for name in self.columns}
+        self.chunk_rows = 0
+        self.count = 0
+
+    def append(self, pos, vel, pressed, prediction, state):
+        row = self.chunk_rows
+        self.chunk['pos'][row] = pos
+        self.chunk['vel'][row] = vel
+        self.chunk['keys'][row] = encode_keys(pressed)
+        self.chunk['prediction'][row] = prediction
+        self.chunk['state'][row] = MAIN_STATES.index(state)
+        self.chunk_rows += 1
+        self.count += 1
+        if self.chunk_rows == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        for name, column_file in self.files.items():
+            column_file.write(self.chunk[name][:self.chunk_rows].tobytes())
+        self.chunk_rows = 0
+
+    def close(self):
+        if self.files is None:
+            return
+        self.flush()
+        for column_file in self.files.values():
+            column_file.close()
+        self.files = None
+
+        meta = dict(self.meta,
+                    count=self.count,
+                    horizon=self.horizon,
+                    columns={name: [dtype, list(shape)] for name, (dtype, shape) in self.columns.items()})
+        temporary_file_name = os.path.join(self.directory, 'meta.json.tmp')
+        with open(temporary_file_name, 'w') as meta_file:
+            json.dump(meta, meta_file, indent=2)
+        os.replace(temporary_file_name, os.path.join(self.directory, 'meta.json'))
+
+
+class TrajectoryReplayer:
+    # Memory-maps a recording written by TrajectoryRecorder; the columns are read-only arrays with one row per tick.
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json')) as meta_file:
+            self.meta = json.load(meta_file)
+
+        self.count = self.meta['count']
+        self.horizon = self.meta['horizon']
+        self.columns = {}
+        for name, (dtype, shape) in self.meta['columns'].items():
+            if self.count == 0:
+                self.columns[name] = np.zeros((0,) + tuple(shape), dtype=dtype)
+            else:
+                self.columns[name] = np.memmap(os.path.join(directory, name + '.bin'),
+                                               dtype=dtype,
+                                               mode='r',
+                                               shape=(self.count,) + tuple(shape))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def pos(self):
+        return self.columns['pos']
+
+    @property
+    def vel(self):
+        return self.columns['vel']
+
+    @property
+    def keys(self):
+        return self.columns['keys']
+
+    @property
+    def prediction(self):
+        return self.columns['prediction']
+
+    @property
+    def state(self):
+        return self.columns['state']
+
+    @property
+    def play(self):
+        # rows of the ticks stepped in play state, when the aims push samples to their predictors
+        return self.state == MAIN_STATES.index('play_state')
+
+    def play_segments(self):
+        # The samples the aims push to their predictors (see feed_predictor), split wherever the game left play state,
+        # one array per stretch of play between a (re)start and a death.
+        play_rows = np.flatnonzero(self.play)
+        if len(play_rows) == 0:
+            return []
+        positions = self.pos[np.maximum(play_rows - 1, 0)]
+        return np.split(positions, np.flatnonzero(np.diff(play_rows) != 1) + 1)
+
+    def input_source(self, loop=False):
+        # drives a Player (or a whole headless MachineRevolution) with the recorded keys
+        return ReplayInputSource(self.keys, loop=loop)
+
+    def feed_predictor(self, predictor, play_only=True):
+        # Pushes the recorded player positions to a predictor backend and returns the trajectory it reports after each
+        # sample. With play_only the samples are those ComputerAim pushes: in every play tick the position at the start
+        # of the tick, recorded in the previous row, so the result lines up with prediction[play]. Meant for the
+        # synchronous backends; the rnn backend predicts on its own worker and drops samples pushed faster than it can
+        # consume them.
+        if play_only:
+            positions = self.pos[np.maximum(np.flatnonzero(self.play) - 1, 0)]
+        else:
+            positions = self.pos
+        trajectories = np.empty((len(positions), predictor.num_y_pred_output, 2), dtype=np.float32)
+        for i, pos in enumerate(positions):
+            predictor.push_sample(pos)
+            trajectories[i] = predictor.get_trajectory()
+        return trajectories
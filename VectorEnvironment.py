@@ -0,0 +1,294 @@
+import argparse
+import time
+import numpy as np
+from PhysicsWorld import PhysicsWorld
+from RingBuffer import RingBuffer
+from NumpyRNNCell import NumpyRNNCell
+from CheckpointWriter import load_weights
+
+
+# Columns of the action array given to VectorEnvironment.step, one row per game:
+ACTION_NAMES = ('up', 'down', 'left', 'right')
+
+AIM_STATES = ('loading', 'standby', 'fire', 'boom')
+
+
+class VectorEnvironment:
+    # Steps num_games independent games in lockstep, without display. Every game is the play state of
+    # MachineRevolution: the player under gravity and key forces, the side wall growing while the player touches it,
+    # and one aim following the predicted player position and firing on its shot timer. Players and aims are rows of
+    # one PhysicsWorld and the predictions of all games are made in one batched call.
+    # predictor: 'constant_velocity', 'constant_acceleration' or 'rnn' (a NumpyRNNCell loaded from model_file_name,
+    # whose hidden state is re-anchored on the last input_length positions every input_length ticks, as the stateful
+    # inference of DynamicBehaviorPredictor does).
+    def __init__(self,
+                 num_games,
+                 screen_size=(800, 600),
+                 sample_rate=30,
+                 default_gravity=9.8,
+                 surface_resistance=0.1,
+                 wall_thickness=100,
+                 wall_resistance=1,
+                 wall_growth=20,
+                 noise_std_deviation=0.1,
+                 predictor='constant_velocity',
+                 model_file_name='./rnn_player_behavior_model.npz',
+                 num_y_pred_output=5,
+                 input_length=100,
+                 smoothing=0.5,
+                 auto_reset=True,
+                 seed=None):
+
+        self.num_games = num_games
+        self.screen_size = np.asarray(screen_size)
+        self.sample_period = 1/sample_rate
+        self.default_gravity = default_gravity
+        self.surface_resistance = surface_resistance
+        self.wall_thickness = wall_thickness
+        self.wall_resistance = wall_resistance
+        self.wall_growth = wall_growth
+        self.noise_std_deviation = noise_std_deviation
+        self.num_y_pred_output = num_y_pred_output
+        self.smoothing = smoothing
+        self.auto_reset = auto_reset
+        self.random = np.random.default_rng(seed)
+
+        # Same constants as the actors built by MachineRevolution:
+        self.player_mass = 2
+        self.key_force = 700
+        self.wall_force = 4000
+        self.aim_mass = 0.1
+        self.aim_action_power = 100
+        self.aim_tolerance = 1
+        self.shot_area = 20
+        self.shot_period = 6
+
+        # rows 0..num_games-1 are the players, num_games..2*num_games-1 the aims:
+        self.world = PhysicsWorld(capacity=2*num_games, seed=self.random.integers(2**32))
+        for _ in range(num_games):
+            self.world.add(mass=self.player_mass,
+                           resistance=surface_resistance,
+                           sample_period=self.sample_period,
+                           noise_std_deviation=noise_std_deviation)
+        for _ in range(num_games):
+            self.world.add(mass=self.aim_mass,
+                           resistance=surface_resistance,
+                           sample_period=self.sample_period,
+                           noise_std_deviation=noise_std_deviation)
+        self.player = slice(0, num_games)
+        self.aim = slice(num_games, 2*num_games)
+
+        self.free = np.ones(num_games, dtype=bool)
+        self.thickness = np.full(num_games, wall_thickness, dtype=np.int64)
+        self.aim_ref_pos = np.zeros((num_games, 2), dtype=np.int64)
+        self.aim_state = np.zeros(num_games, dtype=np.int64)
+        self.shot_timer = np.zeros(num_games, dtype=np.int64)
+        self.shot_pos = np.zeros((num_games, 2), dtype=np.int64)
+        self.ticks = np.zeros(num_games, dtype=np.int64)
+
+        self.predictor = predictor
+        self.prediction = np.zeros((num_games, num_y_pred_output, 2), dtype=np.float32)
+        self.steps = np.arange(1, num_y_pred_output + 1, dtype=np.float32).reshape(1, -1, 1)
+        self.history = np.zeros((num_games, 3, 2), dtype=np.float32)
+        self.velocity = np.zeros((num_games, 2), dtype=np.float32)
+        self.acceleration = np.zeros((num_games, 2), dtype=np.float32)
+        if predictor == 'rnn':
+            self.numpy_cell = NumpyRNNCell.from_weights(load_weights(model_file_name))
+            self.hidden_state = self.numpy_cell.zero_state(num_games)
+            self.input_length = input_length
+            self.positions = RingBuffer(input_length + 1,
+                                        init_value=self.screen_size//2,
+                                        batch_size=num_games)
+            self.resync_timer = np.zeros(num_games, dtype=np.int64)
+        elif predictor not in ('constant_velocity', 'constant_acceleration'):
+            raise ValueError("unknown vector environment predictor: %s" % predictor)
+
+        self.total_ticks = 0
+        self.episode_scores = []
+        self.reset()
+
+    @property
+    def player_pos(self):
+        return self.world.pos[self.player]
+
+    @property
+    def aim_pos(self):
+        return self.world.pos[self.aim]
+
+    def shot_timer_reload(self, count):
+        return (np.abs(self.shot_period*self.random.normal(0, self.noise_std_deviation, count))
+                + 2*self.shot_period).astype(np.int64)
+
+    def reset(self, games=None):
+        # Back to the first play tick of every game, or only of the games selected by the boolean mask `games`.
+        if games is None:
+            games = np.ones(self.num_games, dtype=bool)
+        count = int(np.count_nonzero(games))
+        if count == 0:
+            return
+        player_rows = np.flatnonzero(games)
+        aim_rows = player_rows + self.num_games
+        center = self.screen_size//2
+
+        self.world.pos[player_rows] = center
+        self.world.vel[player_rows] = 0
+        self.world.force[player_rows] = 0
+        self.world.resistance[player_rows] = self.surface_resistance
+        self.world.pos[aim_rows] = self.screen_size
+        self.world.vel[aim_rows] = 0
+        self.world.force[aim_rows] = 0
+
+        self.free[games] = True
+        self.thickness[games] = self.wall_thickness
+        self.aim_ref_pos[games] = self.screen_size
+        self.aim_state[games] = AIM_STATES.index('loading')
+        self.shot_timer[games] = self.shot_timer_reload(count)
+        self.shot_pos[games] = self.screen_size
+        self.ticks[games] = 0
+
+        self.prediction[games] = center
+        self.history[games] = center
+        self.velocity[games] = 0
+        self.acceleration[games] = 0
+        if self.predictor == 'rnn':
+            self.hidden_state[games] = 0
+            self.positions.reset(center, rows=games)
+            self.resync_timer[games] = 0
+
+    def predict(self, player_pos):
+        # one batched prediction for every game
+        if self.predictor == 'rnn':
+            # the state is rebuilt from the window before the newest position, which the rollout then advances with
+            self.positions.append(player_pos)
+            resync = self.resync_timer == 0
+            if resync.any():
+                _, self.hidden_state[resync] = self.numpy_cell.run(self.positions.window[resync, :-1])
+            self.resync_timer[resync] = self.input_length
+            self.resync_timer[~resync] -= 1
+
+            self.hidden_state, self.prediction = self.numpy_cell.rollout(player_pos.astype(np.float32),
+                                                                         self.hidden_state,
+                                                                         self.num_y_pred_output)
+        else:
+            self.history[:, :-1] = self.history[:, 1:]
+            self.history[:, -1] = player_pos
+            self.velocity += self.smoothing*((self.history[:, 2] - self.history[:, 1]) - self.velocity)
+            if self.predictor == 'constant_acceleration':
+                self.acceleration += self.smoothing*((self.history[:, 2] - 2*self.history[:, 1] + self.history[:, 0])
+                                                     - self.acceleration)
+            self.prediction = (self.history[:, 2:3] + self.steps*self.velocity[:, None]
+                               + self.steps*(self.steps + 1)/2*self.acceleration[:, None])
+        return self.prediction
+
+    def step(self, actions):
+        # actions: (num_games, 4) booleans, the keys of ACTION_NAMES held by the player of each game.
+        # Returns the player positions, aim positions, predicted trajectories, rewards (the score gained in the tick)
+        # and the done flags. With auto_reset the games that ended are reset before returning, so positions and
+        # predictions of those games already belong to the next game.
+        actions = np.asarray(actions, dtype=bool)
+        noise = self.noise_std_deviation
+        self.ticks += 1
+        self.total_ticks += self.num_games
+
+        # --------------------------------------------------------------------------------------------------------------
+        # aim shot timer, as ComputerAim.machine_state with the predictor always online:
+        loading = self.aim_state == AIM_STATES.index('loading')
+        standby = ~loading & (self.shot_timer > self.shot_period)
+        fire = ~loading & ~standby & (self.shot_timer > self.shot_period - 1)
+        boom = ~loading & ~standby & ~fire & (self.shot_timer > 0)
+        reload = ~loading & ~standby & ~fire & ~boom
+        self.aim_state[loading | standby] = AIM_STATES.index('standby')
+        self.aim_state[fire] = AIM_STATES.index('fire')
+        self.aim_state[boom] = AIM_STATES.index('boom')
+        self.aim_state[reload] = AIM_STATES.index('loading')
+        self.shot_timer[standby | fire | boom] -= 1
+        self.shot_timer[reload] = self.shot_timer_reload(int(np.count_nonzero(reload)))
+        self.shot_pos[fire] = self.aim_pos[fire]
+
+        # --------------------------------------------------------------------------------------------------------------
+        # forces:
+        player_force = self.world.force[self.player]
+        free = self.free
+        player_force[free, 0] = self.random.normal(0, noise, np.count_nonzero(free))
+        player_force[free, 1] = (self.default_gravity*self.player_mass
+                                 + self.random.normal(0, noise, np.count_nonzero(free)))
+        key_force = self.key_force*np.stack([actions[:, 3].astype(np.int64) - actions[:, 2],
+                                             actions[:, 1].astype(np.int64) - actions[:, 0]], axis=1)
+        player_force[free] += key_force[free]
+
+        aim_force = self.world.force[self.aim]
+        aim_force[...] = self.random.normal(0, noise, (self.num_games, 2))
+
+        self.aim_ref_pos[...] = self.predict(self.player_pos)[:, -1]
+
+        controller_noise = self.random.normal(0, 0.1, (self.num_games, 2))
+        aim_pos = self.aim_pos
+        aim_force[aim_pos < self.aim_ref_pos - self.aim_tolerance + controller_noise] += self.aim_action_power
+        aim_force[aim_pos > self.aim_ref_pos + self.aim_tolerance + controller_noise] -= self.aim_action_power
+
+        self.world.integrate()
+
+        # --------------------------------------------------------------------------------------------------------------
+        # collisions, in the order of CollisionSystem: the player bounces off the wall, then the wall grows.
+        player_pos = self.player_pos
+        half = self.thickness[:, None]//2
+        low = half > player_pos
+        high = player_pos > self.screen_size - half
+        # first matching side in the order left, right, top, bottom:
+        sides = np.stack([low[:, 0], high[:, 0], low[:, 1], high[:, 1]], axis=1)
+        hit = sides.any(axis=1)
+        side = np.argmax(sides, axis=1)
+        hit_rows = np.flatnonzero(hit)
+        player_force[hit_rows, side[hit_rows]//2] = np.where(side[hit_rows] % 2 == 0, self.wall_force, -self.wall_force)
+        self.world.resistance[self.player][hit] = self.wall_resistance
+        self.world.resistance[self.player][~hit] = self.surface_resistance
+        self.free[...] = ~hit
+        self.thickness[hit] += self.wall_growth
+
+        shot = (self.aim_state == AIM_STATES.index('fire')) & \
+            (np.abs(player_pos - self.shot_pos) < self.shot_area).all(axis=1)
+        wall_closed = (self.thickness > self.screen_size[0]) | (self.thickness > self.screen_size[1])
+        dones = shot | wall_closed
+
+        rewards = np.where(dones, 0, 100*self.sample_period)
+
+        player_pos = self.player_pos.copy()
+        aim_pos = self.aim_pos.copy()
+        prediction = self.prediction.copy()
+
+        if dones.any():
+            self.episode_scores.extend((100*self.ticks[dones]*self.sample_period).astype(np.int64))
+            if self.auto_reset:
+                self.reset(dones)
+
+        return player_pos, aim_pos, prediction, rewards, dones
+
+
+def random_actions(random, num_games, hold_probability=0.9, press_probability=0.3, previous=None):
+    # Arrow keys held for a random number of ticks, like RandomInputSource, for every game at once.
+    actions = random.random((num_games, len(ACTION_NAMES))) < press_probability
+    if previous is not None:
+        hold = random.random(num_games) < hold_probability
+        actions[hold] = previous[hold]
+    return actions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--games', type=int, default=256)
+    parser.add_argument('--ticks', type=int, default=1000)
+    parser.add_argument('--predictor', default='constant_velocity')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    environment = VectorEnvironment(args.games, predictor=args.predictor, seed=args.seed)
+    actions = None
+    start_time = time.perf_counter()
+    for _ in range(args.ticks):
+        actions = random_actions(environment.random, args.games, previous=actions)
+        environment.step(actions)
+    wall_time = time.perf_counter() - start_time
+
+    print("%d games x %d ticks: %.0f game-ticks/s, %d games ended, mean score %.1f"
+          % (args.games, args.ticks, environment.total_ticks/wall_time, len(environment.episode_scores),
+             np.mean(environment.episode_scores) if environment.episode_scores else 0))
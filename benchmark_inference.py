@@ -0,0 +1,98 @@
+import argparse
+import time
+import numpy as np
+import tensorflow as tf
+from DynamicBehaviorPredictor import DynamicBehaviorPredictor
+from NumpyRNNCell import NumpyRNNCell, check_numpy_cell
+
+
+# Checks that NumpyRNNCell reproduces the TF graph of DynamicBehaviorPredictor and compares the per-prediction
+# latency of both inference paths:
+#   python benchmark_inference.py --num_neurons 200 --num_y_pred_output 5 --repeat 1000
+# The checks of the cell that need no TensorFlow run first; they also run alone with python NumpyRNNCell.py.
+
+
+def measure(function, repeat):
+    latency = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        latency[i] = time.perf_counter() - start
+    return latency
+
+
+def report(name, latency):
+    print("%-28s mean %8.1f us   p50 %8.1f us   p99 %8.1f us" % (name,
+                                                                   1e6*latency.mean(),
+                                                                   1e6*np.percentile(latency, 50),
+                                                                   1e6*np.percentile(latency, 99)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input_length', type=int, default=100)
+    parser.add_argument('--num_neurons', type=int, default=200)
+    parser.add_argument('--num_y_pred_output', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    check_numpy_cell(num_neurons=args.num_neurons, horizon=args.num_y_pred_output, seed=args.seed)
+    print("NumpyRNNCell checks ok")
+
+    predictor = DynamicBehaviorPredictor(surface_size=(800, 600),
+                                         input_length=args.input_length,
+                                         num_neurons=args.num_neurons,
+                                         num_y_pred_output=args.num_y_pred_output)
+
+    predictor.build_model(seed=args.seed)
+
+    random = np.random.RandomState(args.seed)
+    window = random.uniform(0, 800, (1, args.input_length, predictor.num_input)).astype(np.float32)
+    sample = window[:, -1]
+
+    with tf.Session(graph=predictor.graph) as sess:
+        predictor.sess = sess
+        sess.run(predictor.init)
+        sess.run(predictor.sync_weights)
+        numpy_cell = NumpyRNNCell.from_weights(predictor.export_weights())
+
+        # --------------------------------------------------------------------------------------------------------------
+        # parity:
+        tf_y_window, tf_hidden_state = sess.run([predictor.y_window[0], predictor.states_window[0]],
+                                                feed_dict={predictor.x: window})
+        np_y_window, np_hidden_state = numpy_cell.run(window)
+        np.testing.assert_allclose(np_hidden_state, tf_hidden_state, rtol=1e-4, atol=1e-3)
+        np.testing.assert_allclose(np_y_window, tf_y_window, rtol=1e-4, atol=1e-2)
+
+        tf_h_next, tf_y_rollout = sess.run([predictor.h_next[0], predictor.y_rollout[0]],
+                                           feed_dict={predictor.x_step: sample,
+                                                      predictor.h_step: tf_hidden_state})
+        np_h_next, np_y_rollout = numpy_cell.rollout(sample, np_hidden_state, args.num_y_pred_output)
+        np.testing.assert_allclose(np_h_next, tf_h_next, rtol=1e-4, atol=1e-3)
+        np.testing.assert_allclose(np_y_rollout, tf_y_rollout, rtol=1e-4, atol=1e-2)
+
+        print("parity ok: max |y_rollout| error %.2e" % np.abs(np_y_rollout - tf_y_rollout).max())
+
+        # --------------------------------------------------------------------------------------------------------------
+        # latency per prediction:
+        def tf_stateful():
+            sess.run([predictor.h_next[0], predictor.y_rollout[0]],
+                     feed_dict={predictor.x_step: sample,
+                                predictor.h_step: tf_hidden_state})
+
+        def tf_window():
+            y_print = window
+            for _ in range(args.num_y_pred_output):
+                y_print = sess.run(predictor.y_window[0], feed_dict={predictor.x: y_print})
+
+        def numpy_stateful():
+            numpy_cell.rollout(sample, np_hidden_state, args.num_y_pred_output)
+
+        report('tensorflow stateful', measure(tf_stateful, args.repeat))
+        report('tensorflow window', measure(tf_window, max(1, args.repeat//10)))
+        report('numpy stateful', measure(numpy_stateful, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
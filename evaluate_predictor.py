@@ -0,0 +1,207 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+# set before pygame is first imported (through TrajectoryRecorder and Actor), here and in the spawned workers, so the
+# pygame banner stays off the JSON report on stdout:
+if 'PYGAME_HIDE_SUPPORT_PROMPT' not in os.environ:
+    os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+import numpy as np
+from Actor import ComputerAim
+from TrajectoryRecorder import TrajectoryReplayer, find_recordings
+
+
+# Replays recorded sessions through an aim predictor configuration on a process pool and writes one JSON report: the
+# prediction error and shot_area hit rate at every horizon step, and the latency percentiles of the predict and train
+# steps. Every session is evaluated by its own predictor, built like ComputerAim builds it:
+#   python evaluate_predictor.py recordings --backend kalman --report kalman.json
+#   python evaluate_predictor.py recordings --backend rnn --option inference_engine=tensorflow --report rnn.json
+
+
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+def parse_option(text):
+    # name=value, value read as JSON when it parses (numbers, true, null, ...) and as a string otherwise
+    name, value = text.split('=', 1)
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
+
+
+def init_worker():
+    # The predictors print their progress (TensorFlow load time, warm start); it goes to stderr so the report is the
+    # only output on stdout.
+    sys.stdout = sys.stderr
+
+
+def wait_for_worker(predictor, predict_steps, train_steps):
+    # The rnn backend predicts and trains on its own workers. The evaluation runs in lockstep, as a game whose
+    # workers keep up: every sample is predicted, and trained on every train_period samples, before the next one.
+    while predictor.predict_steps < predict_steps or predictor.train_steps < train_steps:
+        if not (predictor.train_and_predict_thread_handler.is_alive() and predictor.predict_thread_handler.is_alive()):
+            raise RuntimeError("predictor worker stopped after %d predict and %d train steps"
+                               % (predictor.predict_steps, predictor.train_steps))
+        time.sleep(0.0001)
+
+
+def evaluate_recording(task):
+    recording, backend, options, shot_area = task
+    replayer = TrajectoryReplayer(recording)
+    predictor = ComputerAim.make_predictor(backend, surface_size=replayer.meta['screen_size'], **options)
+    horizon = predictor.num_y_pred_output
+    asynchronous = hasattr(predictor, 'predict_latency')
+
+    predictor.start()
+    while predictor.status != 'online':
+        if asynchronous and not predictor.train_and_predict_thread_handler.is_alive():
+            raise RuntimeError("%s predictor failed to start" % backend)
+        time.sleep(0.01)
+
+    error_sum = np.zeros(horizon)
+    squared_error_sum = np.zeros(horizon)
+    hits = np.zeros(horizon, dtype=np.int64)
+    counts = np.zeros(horizon, dtype=np.int64)
+    step_latency = []
+    samples = 0
+
+    segments = replayer.play_segments()
+    for segment in segments:
+        predictor.reset()
+        trajectories = np.empty((len(segment), horizon, 2))
+        for i, sample in enumerate(segment):
+            step_start = time.perf_counter()
+            predictor.push_sample([int(sample[0]), int(sample[1])])
+            samples += 1
+            if asynchronous:
+                wait_for_worker(predictor, samples, samples//predictor.train_period)
+            trajectories[i] = predictor.get_trajectory()
+            step_latency.append(time.perf_counter() - step_start)
+
+        # the prediction k steps ahead made after sample i is the position pushed as sample i + k
+        for k in range(1, min(horizon, len(segment) - 1) + 1):
+            difference = trajectories[:-k, k - 1] - segment[k:]
+            distance = np.hypot(difference[:, 0], difference[:, 1])
+            error_sum[k - 1] += distance.sum()
+            squared_error_sum[k - 1] += np.square(distance).sum()
+            # the hit test of ComputerAim.collision, with the aim firing at the predicted position:
+            hits[k - 1] += np.count_nonzero((np.abs(difference) < shot_area).all(axis=1))
+            counts[k - 1] += len(distance)
+
+    if asynchronous:
+        predict_latency = np.asarray(predictor.predict_latency)
+        train_latency = np.asarray(predictor.train_latency)
+        predictor.close()
+        predictor.train_and_predict_thread_handler.join()
+    else:
+        # synchronous backends predict and update their filter inside push_sample
+        predict_latency = np.asarray(step_latency)
+        train_latency = None
+        predictor.close()
+
+    return {'recording': recording,
+            'segments': len(segments),
+            'samples': samples,
+            'error_sum': error_sum,
+            'squared_error_sum': squared_error_sum,
+            'hits': hits,
+            'counts': counts,
+            'predict_latency': predict_latency,
+            'train_latency': train_latency}
+
+
+def horizon_report(error_sum, squared_error_sum, hits, counts):
+    # per horizon step, in pixels; None where no sample was long enough to be scored
+    scored = np.maximum(counts, 1)
+    return {'mean_error': [round(float(value), 3) if count > 0 else None
+                           for value, count in zip(error_sum/scored, counts)],
+            'rmse': [round(float(value), 3) if count > 0 else None
+                     for value, count in zip(np.sqrt(squared_error_sum/scored), counts)],
+            'hit_rate': [round(float(value), 4) if count > 0 else None
+                         for value, count in zip(hits/scored, counts)],
+            'count': [int(count) for count in counts]}
+
+
+def latency_report(latency):
+    # microseconds
+    if latency is None or len(latency) == 0:
+        return None
+    report = {'count': len(latency),
+              'mean': round(1e6*float(np.mean(latency)), 1),
+              'max': round(1e6*float(np.max(latency)), 1)}
+    for percentile in LATENCY_PERCENTILES:
+        report['p%d' % percentile] = round(1e6*float(np.percentile(latency, percentile)), 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('recordings', nargs='+', help='recording directories, or directories of recordings')
+    parser.add_argument('--backend', default='rnn', help='aim predictor backend')
+    parser.add_argument('--option', action='append', default=[], type=parse_option, metavar='NAME=VALUE',
+                        help='predictor option over the ones of ComputerAim.make_predictor, repeatable')
+    parser.add_argument('--shot_area', type=int, default=20, help='half side of the shot square of ComputerAim')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='processes, one per core by default')
+    parser.add_argument('--report', default=None, help='JSON report file, standard output when not given')
+    args = parser.parse_args()
+
+    recordings = find_recordings(args.recordings)
+    if len(recordings) == 0:
+        raise FileNotFoundError("no recordings in %s" % ', '.join(args.recordings))
+
+    options = dict(args.option)
+    if args.backend == 'rnn':
+        # evaluation keeps every latency sample and must not overwrite the checkpoint the game warm-starts from
+        options = dict({'update_model': False, 'latency_window': None}, **options)
+
+    tasks = [(recording, args.backend, options, args.shot_area) for recording in recordings]
+    workers = max(1, min(args.workers, len(tasks)))
+    evaluation_start = time.perf_counter()
+    # spawned workers, each evaluating a single session: a TensorFlow session does not survive a fork, and a fresh
+    # process releases everything the predictor of the previous session held
+    with multiprocessing.get_context('spawn').Pool(processes=workers,
+                                                   initializer=init_worker,
+                                                   maxtasksperchild=1) as pool:
+        results = list(pool.imap(evaluate_recording, tasks))
+    wall_time = time.perf_counter() - evaluation_start
+
+    train_latencies = [result['train_latency'] for result in results if result['train_latency'] is not None]
+    report = {'backend': args.backend,
+              'options': options,
+              'shot_area': args.shot_area,
+              'recordings': len(results),
+              'segments': sum(result['segments'] for result in results),
+              'samples': sum(result['samples'] for result in results),
+              'workers': workers,
+              'wall_time': round(wall_time, 2),
+              'horizon': horizon_report(sum(result['error_sum'] for result in results),
+                                        sum(result['squared_error_sum'] for result in results),
+                                        sum(result['hits'] for result in results),
+                                        sum(result['counts'] for result in results)),
+              'latency_us': {'predict': latency_report(np.concatenate([result['predict_latency']
+                                                                       for result in results])),
+                             'train': latency_report(np.concatenate(train_latencies) if train_latencies else None)},
+              'per_recording': [dict(horizon_report(result['error_sum'],
+                                                    result['squared_error_sum'],
+                                                    result['hits'],
+                                                    result['counts']),
+                                     recording=result['recording'],
+                                     samples=result['samples'])
+                                for result in results]}
+
+    if args.report is None:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+    else:
+        with open(args.report, 'w') as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
+        print("%d recordings, %d samples in %.1f s: step %d mean error %s px, hit rate %s -> %s"
+              % (report['recordings'], report['samples'], wall_time, len(report['horizon']['count']),
+                 report['horizon']['mean_error'][-1], report['horizon']['hit_rate'][-1], args.report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+import argparse
+import queue
+import threading
+import time
+import numpy as np
+import tensorflow as tf
+from DynamicBehaviorPredictor import DynamicBehaviorPredictor
+from CheckpointWriter import CheckpointWriter
+from TrajectoryRecorder import TrajectoryReplayer, find_recordings
+
+
+# Trains the player-behavior RNN of DynamicBehaviorPredictor on trajectories recorded with --record, off the game
+# loop and in large batches, and writes a checkpoint the game warm-starts from (--load_model). Games played by people
+# are recorded one directory per session; headless bot games only exercise the pipeline:
+#   python MachineRevolution.py --backend kalman --record recordings/session-1
+#   python train_offline.py recordings --epochs 5 --batch_size 256 --model_file_name ./rnn_player_behavior_model.npz
+
+
+def recording_windows(recording, window_length, stride):
+    # windows never span a death or a restart
+    for segment in TrajectoryReplayer(recording).play_segments():
+        for start in range(0, len(segment) - window_length + 1, stride):
+            yield segment[start:start + window_length]
+
+
+def interleave(generators, cycle_length):
+    # Round robin over cycle_length generators at a time, the next one taking the place of each exhausted one, so
+    # consecutive windows come from different recordings.
+    generators = iter(generators)
+    active = []
+    for generator in generators:
+        active.append(generator)
+        if len(active) == cycle_length:
+            break
+
+    while active:
+        for generator in list(active):
+            try:
+                yield next(generator)
+            except StopIteration:
+                active.remove(generator)
+                for next_generator in generators:
+                    active.append(next_generator)
+                    break
+
+
+def shuffle(items, buffer_size, random):
+    # Shuffles within a bounded buffer: every new item takes the place of a uniformly chosen buffered one, which is
+    # yielded. Memory stays at buffer_size items whatever the size of the recordings.
+    buffer = []
+    for item in items:
+        if len(buffer) < buffer_size:
+            buffer.append(item)
+            continue
+        index = random.integers(buffer_size)
+        yield buffer[index]
+        buffer[index] = item
+
+    random.shuffle(buffer)
+    yield from buffer
+
+
+def batches(windows, batch_size, window_length, num_input):
+    # the last batch of an epoch may be smaller
+    batch = np.empty((batch_size, window_length, num_input), dtype=np.float32)
+    size = 0
+    for window in windows:
+        batch[size] = window
+        size += 1
+        if size == batch_size:
+            yield batch
+            batch = np.empty_like(batch)
+            size = 0
+    if size > 0:
+        yield batch[:size]
+
+
+def prefetch(items, depth):
+    # Produces items on a background thread, up to depth ahead, so reading and shuffling windows overlaps training.
+    item_queue = queue.Queue(maxsize=depth)
+    end = object()
+
+    def producer():
+        for item in items:
+            item_queue.put(item)
+        item_queue.put(end)
+
+    producer_thread = threading.Thread(target=producer, daemon=True)
+    producer_thread.start()
+    while True:
+        item = item_queue.get()
+        if item is end:
+            break
+        yield item
+
+
+def epoch_batches(recordings, args, num_input, random):
+    window_length = args.input_length + 1
+    recording_order = random.permutation(len(recordings))
+    windows = interleave((recording_windows(recordings[i], window_length, args.stride) for i in recording_order),
+                         args.cycle_length)
+    return prefetch(batches(shuffle(windows, args.shuffle_buffer, random),
+                            args.batch_size,
+                            window_length,
+                            num_input),
+                    args.prefetch)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('recordings', nargs='+', help='recording directories, or directories of recordings')
+    parser.add_argument('--input_length', type=int, default=100)
+    parser.add_argument('--num_neurons', type=int, default=200)
+    parser.add_argument('--learning_rate', type=float, default=0.001)
+    parser.add_argument('--batch_size', type=int, default=256)
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--stride', type=int, default=1, help='ticks between the starts of consecutive windows')
+    parser.add_argument('--shuffle_buffer', type=int, default=20000, help='windows held by the shuffle buffer')
+    parser.add_argument('--cycle_length', type=int, default=16, help='recordings read from at the same time')
+    parser.add_argument('--prefetch', type=int, default=4, help='batches prepared ahead of training')
+    parser.add_argument('--model_file_name', default='./rnn_player_behavior_model.npz')
+    parser.add_argument('--load_model', action='store_true', help='continue from the weights in model_file_name')
+    parser.add_argument('--checkpoint_interval', type=float, default=60.0)
+    parser.add_argument('--log_period', type=int, default=100, help='train steps between progress lines')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    recordings = find_recordings(args.recordings)
+    if len(recordings) == 0:
+        raise FileNotFoundError("no recordings in %s" % ', '.join(args.recordings))
+    meta = TrajectoryReplayer(recordings[0]).meta
+    print("%d recordings" % len(recordings))
+
+    predictor = DynamicBehaviorPredictor(surface_size=meta['screen_size'],
+                                         input_length=args.input_length,
+                                         num_neurons=args.num_neurons,
+                                         batch_size=args.batch_size,
+                                         learning_rate=args.learning_rate,
+                                         num_y_pred_output=meta['horizon'],
+                                         model_file_name=args.model_file_name)
+
+    predictor.build_model(seed=args.seed)
+    random = np.random.default_rng(args.seed)
+
+    checkpoint_writer = CheckpointWriter(args.model_file_name, min_interval=args.checkpoint_interval)
+    checkpoint_writer.start()
+
+    with tf.Session(graph=predictor.graph) as sess:
+        predictor.sess = sess
+        sess.run(predictor.init)
+        if args.load_model:
+            predictor.warm_start()
+
+        train_start = time.perf_counter()
+        windows_trained = 0
+        try:
+            for epoch in range(args.epochs):
+                epoch_loss = 0
+                epoch_windows = 0
+                for batch in epoch_batches(recordings, args, predictor.num_input, random):
+                    _, loss_value = sess.run([predictor.train, predictor.loss],
+                                             feed_dict={predictor.x: batch[:, :-1],
+                                                        predictor.y_true: batch[:, 1:]})
+                    predictor.train_steps += 1
+                    epoch_loss += loss_value*len(batch)
+                    epoch_windows += len(batch)
+
+                    if predictor.train_steps % args.log_period == 0:
+                        print("step %d: loss %.2f, %.0f windows/s"
+                              % (predictor.train_steps, loss_value,
+                                 (windows_trained + epoch_windows)/(time.perf_counter() - train_start)))
+                    if checkpoint_writer.due():
+                        checkpoint_writer.submit(predictor.export_weights())
+
+                if epoch_windows == 0:
+                    raise ValueError("no play segment of the recordings is longer than %d ticks" % args.input_length)
+                windows_trained += epoch_windows
+                print("epoch %d: %d windows, mean loss %.2f" % (epoch + 1, epoch_windows, epoch_loss/epoch_windows))
+
+            checkpoint_writer.submit(predictor.export_weights())
+        finally:
+            checkpoint_writer.close()
+
+    print("%d train steps in %.1f s, checkpoint %s"
+          % (predictor.train_steps, time.perf_counter() - train_start, args.model_file_name))
+
+
+if __name__ == '__main__':
+    main()